@@ -0,0 +1,358 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import database
+import serializers
+
+# ---------------- SETTINGS ----------------
+# Breakdowns over at least this many events run in a worker process, so a big
+# aggregation never holds the GIL while other requests are being served.
+# COLLEGIA_ANALYTICS_WORKERS=0 keeps every breakdown in the calling thread.
+PROCESS_THRESHOLD = int(os.environ.get("COLLEGIA_ANALYTICS_PROCESS_THRESHOLD", "50000"))
+WORKERS = int(os.environ.get("COLLEGIA_ANALYTICS_WORKERS", "2"))
+
+DIMENSIONS = ("college", "type", "period")
+
+# Stand-ins for NULL in the integer columns.
+NO_COLLEGE = np.iinfo(np.int64).min
+NO_DAY = np.iinfo(np.int64).min
+
+# ---------------- SNAPSHOT ----------------
+Columns = Dict[str, np.ndarray]
+
+MEASURES = ("registrations", "attended", "rating_sum", "rating_count")
+COLUMN_NAMES = ("event_id", "college_id", "type", "day", *MEASURES)
+
+def _days(dates: Sequence[Optional[str]]) -> np.ndarray:
+    """ISO dates as days since 1970-01-01; NULL or unparseable dates become NO_DAY."""
+    try:
+        return np.array(dates, dtype="datetime64[D]").astype(np.int64)
+    except ValueError:
+        pass
+    days = np.full(len(dates), NO_DAY, dtype=np.int64)
+    for i, value in enumerate(dates):
+        try:
+            days[i] = np.datetime64(value[:10], "D").astype(np.int64)
+        except (TypeError, ValueError):
+            continue
+    return days
+
+class Snapshot:
+    """
+    One row per event held as NumPy columns: event_id, college_id, type (a code
+    into `types`), day, and the event_stats counters. Immutable once built, so
+    readers can keep using one while a refresh builds its successor.
+    """
+
+    def __init__(self, columns: Columns, types: Tuple[Optional[str], ...], seq: int):
+        self.columns = columns
+        self.types = types
+        self.seq = seq
+
+    def __len__(self) -> int:
+        return len(self.columns["event_id"])
+
+    @classmethod
+    def empty(cls) -> "Snapshot":
+        columns = {name: np.empty(0, dtype=np.int64) for name in COLUMN_NAMES}
+        return cls(columns, (), 0)
+
+    def _encode(self, rows: List[tuple]) -> Tuple[Columns, Tuple[Optional[str], ...]]:
+        """Turn (event_id, live, college_id, type, date, *measures) rows into columns."""
+        codes = {name: code for code, name in enumerate(self.types)}
+        event_ids, _, colleges, types, dates, *measures = zip(*rows) if rows else [()] * (5 + len(MEASURES))
+        type_codes = [codes.setdefault(name, len(codes)) for name in types]
+        columns = {
+            "event_id": np.array(event_ids, dtype=np.int64),
+            "college_id": np.array([NO_COLLEGE if c is None else c for c in colleges], dtype=np.int64),
+            "type": np.array(type_codes, dtype=np.int64),
+            "day": _days(dates),
+        }
+        for name, values in zip(MEASURES, measures):
+            columns[name] = np.array(values, dtype=np.int64)
+        return columns, tuple(codes)
+
+    def updated(self, rows: List[tuple], seq: int) -> "Snapshot":
+        """A new snapshot with the changed events in `rows` replaced or removed."""
+        changed = np.array([row[0] for row in rows], dtype=np.int64)
+        keep = ~np.isin(self.columns["event_id"], changed)
+        fresh, types = self._encode([row for row in rows if row[1]])
+        columns = {name: np.concatenate([column[keep], fresh[name]]) for name, column in self.columns.items()}
+        return Snapshot(columns, types, seq)
+
+def load_snapshot() -> Snapshot:
+    """Bulk-load every event and its counters."""
+    seq, _, rows = database.fetch_event_measures()
+    columns, types = Snapshot.empty()._encode(rows)
+    return Snapshot(columns, types, seq)
+
+def refresh_snapshot(snapshot: Snapshot) -> Snapshot:
+    """
+    Bring a snapshot up to date by reading only the events changed since it
+    was taken. Falls back to a full load when the result does not account for
+    every event, i.e. when rows were written without going through the change
+    log (bulk loads that drop the triggers, restores, manual edits).
+    """
+    seq, events, rows = database.fetch_event_measures(since=snapshot.seq)
+    if rows:
+        snapshot = snapshot.updated(rows, seq)
+    elif seq != snapshot.seq:
+        snapshot = Snapshot(snapshot.columns, snapshot.types, seq)
+    if len(snapshot) != events:
+        return load_snapshot()
+    return snapshot
+
+# ---------------- BREAKDOWNS ----------------
+def _periods(days: np.ndarray, interval: str) -> np.ndarray:
+    """Week (as the day number of its Monday) or month (months since 1970-01) of each day."""
+    periods = np.full(len(days), NO_DAY, dtype=np.int64)
+    dated = days != NO_DAY
+    if interval == "week":
+        # 1970-01-01 was a Thursday, three days after the Monday that starts its week.
+        periods[dated] = days[dated] - (days[dated] + 3) % 7
+    else:
+        periods[dated] = days[dated].astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    return periods
+
+def _period_labels(periods: np.ndarray, interval: str) -> List[Optional[str]]:
+    unit = "D" if interval == "week" else "M"
+    labels = np.datetime_as_string(np.where(periods == NO_DAY, 0, periods).astype(f"datetime64[{unit}]"))
+    return [None if period == NO_DAY else label for period, label in zip(periods.tolist(), labels.tolist())]
+
+def _group(keys: List[np.ndarray], count: int) -> Tuple[List[np.ndarray], np.ndarray]:
+    """
+    Group `count` rows by several integer key columns. Returns each group's
+    value in every column, in sorted order, and the group index of every row.
+    The columns are factorised and packed into a single int64 key, which sorts
+    far faster than np.unique(axis=0) over the stacked columns.
+    """
+    if not count:
+        return [key[:0] for key in keys], np.zeros(0, dtype=np.int64)
+    packed = np.zeros(count, dtype=np.int64)
+    distinct = []
+    for key in keys:
+        values, codes = np.unique(key, return_inverse=True)
+        packed = packed * len(values) + codes.reshape(-1)
+        distinct.append(values)
+    unique_packed, inverse = np.unique(packed, return_inverse=True)
+    groups = []
+    for values in reversed(distinct):
+        unique_packed, codes = np.divmod(unique_packed, len(values))
+        groups.append(values[codes])
+    return groups[::-1], inverse.reshape(-1)
+
+def breakdown(
+    columns: Columns,
+    types: Tuple[Optional[str], ...],
+    by: Sequence[str] = DIMENSIONS,
+    interval: str = "month",
+    college_id: Optional[int] = None,
+    event_type: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    as_json: bool = False,
+):
+    """
+    Group the snapshot's events by the `by` dimensions and total their counters.
+    Returns a list of dicts, or with as_json=True serializers.EncodedRows.
+    Takes the bare columns rather than a Snapshot so it can run in a worker process.
+    """
+    mask = np.ones(len(columns["event_id"]), dtype=bool)
+    if college_id is not None:
+        mask &= columns["college_id"] == college_id
+    if event_type is not None:
+        mask &= columns["type"] == (types.index(event_type) if event_type in types else -1)
+    if date_from is not None:
+        mask &= (columns["day"] != NO_DAY) & (columns["day"] >= _days([date_from])[0])
+    if date_to is not None:
+        mask &= (columns["day"] != NO_DAY) & (columns["day"] <= _days([date_to])[0])
+    selected = {name: column[mask] for name, column in columns.items()}
+    count = int(mask.sum())
+
+    # Rank the type codes by name so that groups come out in name order.
+    order = sorted(range(len(types)), key=lambda code: (types[code] is not None, types[code] or ""))
+    type_rank = np.empty(len(types), dtype=np.int64)
+    type_rank[order] = np.arange(len(types))
+    keys = {
+        "college": selected["college_id"],
+        "type": type_rank[selected["type"]] if len(types) else selected["type"],
+        "period": _periods(selected["day"], interval),
+    }
+
+    groups, inverse = _group([keys[name] for name in by], count)
+    size = len(inverse) and int(inverse.max()) + 1
+    totals = {"events": np.bincount(inverse, minlength=size)}
+    for name in MEASURES:
+        totals[name] = np.bincount(inverse, weights=selected[name], minlength=size).astype(np.int64)
+
+    labels: Dict[str, list] = {}
+    for name, column in zip(by, groups):
+        if name == "college":
+            labels["college_id"] = [None if c == NO_COLLEGE else c for c in column.tolist()]
+        elif name == "type":
+            labels["type"] = [types[order[rank]] for rank in column.tolist()]
+        else:
+            labels["period"] = _period_labels(column, interval)
+
+    totals = {name: values.tolist() for name, values in totals.items()}
+    attended, registrations = totals["attended"], totals["registrations"]
+    rating_sum, rating_count = totals["rating_sum"], totals["rating_count"]
+    columns = {
+        **labels,
+        "events": totals["events"],
+        "registrations": registrations,
+        "attended": attended,
+        "attendance_percentage": [
+            round(a * 100.0 / r, 2) if r else None for a, r in zip(attended, registrations)
+        ],
+        "ratings": rating_count,
+        "avg_feedback": [round(t / c, 2) if c else None for t, c in zip(rating_sum, rating_count)],
+    }
+    names = tuple(columns)
+    rows = list(zip(*columns.values()))
+    if as_json:
+        # Encoded here, so a worker process sends back one bytes object.
+        layout = serializers.RowLayout(names, *serializers.COMPACT)
+        body = "[" + ",".join([layout.encode(row) for row in rows]) + "]"
+        return serializers.EncodedRows(body.encode("utf-8"), size, names, rows[-1] if rows else None)
+    return [dict(zip(names, row)) for row in rows]
+
+# ---------------- WORKER PROCESSES ----------------
+# Snapshots never travel through the executor's pipe: the engine copies each
+# one into a shared memory block once, and a request only carries the block's
+# name and the query. Workers map the latest block they were sent.
+_attached: Dict[str, Tuple[SharedMemory, Columns]] = {}
+
+def _share(snapshot: Snapshot) -> SharedMemory:
+    """Copy a snapshot's columns into a new shared memory block."""
+    block = SharedMemory(create=True, size=max(len(snapshot), 1) * len(COLUMN_NAMES) * 8)
+    matrix = np.ndarray((len(COLUMN_NAMES), len(snapshot)), dtype=np.int64, buffer=block.buf)
+    for i, name in enumerate(COLUMN_NAMES):
+        matrix[i] = snapshot.columns[name]
+    del matrix
+    return block
+
+def _attach(name: str, size: int) -> Optional[Columns]:
+    """The columns in block `name`, or None if the engine has already dropped it."""
+    if name not in _attached:
+        try:
+            block = SharedMemory(name=name)
+        except FileNotFoundError:
+            return None
+        for old in list(_attached):
+            old_block, old_columns = _attached.pop(old)
+            del old_columns
+            try:
+                old_block.close()
+            except BufferError:
+                pass  # a view is still alive; the mapping goes when it does
+        matrix = np.ndarray((len(COLUMN_NAMES), size), dtype=np.int64, buffer=block.buf)
+        _attached[name] = (block, dict(zip(COLUMN_NAMES, matrix)))
+    return _attached[name][1]
+
+def _shared_breakdown(name: str, size: int, types: Tuple[Optional[str], ...], by, interval, filters):
+    """breakdown() in a worker process, over the snapshot in shared memory block `name`."""
+    columns = _attach(name, size)
+    if columns is None:
+        return None
+    return breakdown(columns, types, by, interval, **filters)
+
+# ---------------- ENGINE ----------------
+class AnalyticsEngine:
+    """
+    Keeps a snapshot of one database current and answers breakdowns from it.
+    The snapshot is refreshed incrementally whenever the database has changed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._snapshot: Optional[Snapshot] = None
+        self._token: Optional[str] = None
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._shared: List[Tuple[Snapshot, SharedMemory]] = []  # oldest first
+
+    def snapshot(self) -> Snapshot:
+        token = database.change_token()
+        if token == self._token and self._snapshot is not None:
+            return self._snapshot
+        with self._lock:
+            if token != self._token or self._snapshot is None:
+                if self._snapshot is None:
+                    self._snapshot = load_snapshot()
+                else:
+                    self._snapshot = refresh_snapshot(self._snapshot)
+                self._token = token
+            return self._snapshot
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn rather than fork: the server process has threads and open connections.
+                self._executor = ProcessPoolExecutor(WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _shared_block(self, snapshot: Snapshot) -> SharedMemory:
+        """The shared memory copy of `snapshot`, made on first use."""
+        with self._lock:
+            for shared, block in self._shared:
+                if shared is snapshot:
+                    return block
+            block = _share(snapshot)
+            self._shared.append((snapshot, block))
+            # Keep the previous block for requests still queued against it; a
+            # worker that finds its block gone answers None and we run in-thread.
+            while len(self._shared) > 2:
+                _, old = self._shared.pop(0)
+                old.close()
+                old.unlink()
+            return block
+
+    def breakdown(self, by: Sequence[str] = DIMENSIONS, interval: str = "month", **filters):
+        snapshot = self.snapshot()
+        if WORKERS > 0 and len(snapshot) >= PROCESS_THRESHOLD:
+            block = self._shared_block(snapshot)
+            rows = self._process_pool().submit(
+                _shared_breakdown, block.name, len(snapshot), snapshot.types, tuple(by), interval, filters
+            ).result()
+            if rows is not None:
+                return rows
+        return breakdown(snapshot.columns, snapshot.types, by, interval, **filters)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+            for _, block in self._shared:
+                block.close()
+                block.unlink()
+            self._shared = []
+
+_engine: Optional[AnalyticsEngine] = None
+_engine_lock = threading.Lock()
+
+def get_engine() -> AnalyticsEngine:
+    """Return the process-wide engine for database.DB_PATH, creating it on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None and _engine.path != database.DB_PATH:
+            _engine.close()
+            _engine = None
+        if _engine is None:
+            _engine = AnalyticsEngine(database.DB_PATH)
+        return _engine
+
+def close_engine() -> None:
+    """Drop the snapshot and stop the worker processes. Called on application shutdown."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.close()
+            _engine = None
@@ -0,0 +1,9 @@
+"""
+Benchmark tooling for Collegia.
+
+generate      -- bulk-load a database with synthetic colleges, events, students,
+                 registrations and feedback at realistic volumes
+load          -- drive every route of the FastAPI app in-process, concurrently,
+                 and record throughput and latency percentiles as JSON
+serialization -- time dict-based list responses against serializers.encode_cursor
+"""
@@ -0,0 +1,179 @@
+"""
+Fill a Collegia database with synthetic data.
+
+    python -m benchmark.generate --registrations 1000000
+
+Rows are inserted with executemany() in large chunks inside one transaction.
+Triggers and secondary indexes are dropped for the duration of the load and
+recreated at the end, and the summary, count and search tables are rebuilt
+once, which is far cheaper than maintaining them row by row.
+"""
+import argparse
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+import database
+
+CHUNK_SIZE = 50_000
+EVENT_TYPES = ["Seminar", "Workshop", "Hackathon", "Cultural", "Sports", "Career Fair", "Guest Lecture"]
+TOPICS = [
+    "Python", "Robotics", "Machine Learning", "Cloud", "Security", "Design", "Film", "Music",
+    "Entrepreneurship", "Data Science", "Chemistry", "Astronomy", "Debate", "Photography", "Dance",
+]
+LOCATIONS = ["Auditorium", "Lab 1", "Lab 2", "Main Hall", "Library", "Sports Complex", "Open Air Theatre"]
+
+
+def _chunks(rows: Iterator[tuple], size: int = CHUNK_SIZE) -> Iterator[List[tuple]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _events(rng: random.Random, count: int, colleges: int, start: date) -> Iterator[tuple]:
+    for _ in range(count):
+        topic = rng.choice(TOPICS)
+        kind = rng.choice(EVENT_TYPES)
+        yield (
+            f"{topic} {kind}",
+            (start + timedelta(days=rng.randrange(365))).isoformat(),
+            rng.choice(LOCATIONS),
+            f"{kind} on {topic.lower()} with {rng.choice(TOPICS).lower()} sessions",
+            kind,
+            rng.randint(1, colleges),
+        )
+
+
+def _students(count: int, offset: int) -> Iterator[tuple]:
+    for i in range(offset, offset + count):
+        yield (f"Student {i}", f"student{i}@example.edu")
+
+
+def _pairs(rng: random.Random, count: int, students: range, events: range) -> List[Tuple[int, int]]:
+    """`count` distinct (student_id, event_id) pairs, in primary-key order."""
+    space = len(students) * len(events)
+    if count > space:
+        raise ValueError(f"Only {space} distinct registrations are possible")
+    picks = sorted(rng.sample(range(space), count))
+    return [(students[i // len(events)], events[i % len(events)]) for i in picks]
+
+
+def _derived_objects(conn: sqlite3.Connection) -> List[Tuple[str, str, str]]:
+    """Triggers and explicit indexes, which are cheaper to recreate after the load."""
+    return conn.execute(
+        "SELECT type, name, sql FROM sqlite_master WHERE type IN ('trigger', 'index') AND sql IS NOT NULL"
+    ).fetchall()
+
+
+def generate(
+    path: str = database.DB_PATH,
+    colleges: int = 20,
+    events: int = 5_000,
+    students: int = 50_000,
+    registrations: int = 1_000_000,
+    feedback: int = 200_000,
+    attendance_rate: float = 0.7,
+    seed: int = 42,
+) -> Dict[str, float]:
+    """Append synthetic rows to the database at `path`; returns timings in seconds."""
+    rng = random.Random(seed)
+    database.close_pool()
+    database.DB_PATH = path
+    database.init_db()
+    database.close_pool()
+
+    timings = {}
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -262144")
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        derived = _derived_objects(conn)
+        for kind, name, _ in derived:
+            conn.execute(f"DROP {kind.upper()} {name}")
+
+        started = time.perf_counter()
+        first_event = (conn.execute("SELECT MAX(id) FROM events").fetchone()[0] or 0) + 1
+        for chunk in _chunks(_events(rng, events, colleges, date(2025, 1, 1))):
+            conn.executemany(
+                "INSERT INTO events (name, date, location, description, type, college_id) VALUES (?, ?, ?, ?, ?, ?)",
+                chunk,
+            )
+        first_student = (conn.execute("SELECT MAX(id) FROM students").fetchone()[0] or 0) + 1
+        for chunk in _chunks(_students(students, first_student)):
+            conn.executemany("INSERT INTO students (name, email) VALUES (?, ?)", chunk)
+        timings["events_students"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        pairs = _pairs(
+            rng, registrations,
+            range(first_student, first_student + students),
+            range(first_event, first_event + events),
+        )
+        rows = ((s, e, int(rng.random() < attendance_rate)) for s, e in pairs)
+        for chunk in _chunks(rows):
+            conn.executemany(
+                "INSERT OR IGNORE INTO registrations (student_id, event_id, attended) VALUES (?, ?, ?)", chunk
+            )
+        timings["registrations"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        rated = sorted(rng.sample(range(len(pairs)), min(feedback, len(pairs))))
+        rows = ((*pairs[i], rng.choices([1, 2, 3, 4, 5], [1, 2, 5, 9, 7])[0], "Synthetic feedback") for i in rated)
+        for chunk in _chunks(rows):
+            conn.executemany(
+                "INSERT OR IGNORE INTO feedback (student_id, event_id, rating, comments) VALUES (?, ?, ?, ?)", chunk
+            )
+        timings["feedback"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _, _, sql in derived:
+            conn.execute(sql)
+        for statement in database._REBUILD_SUMMARIES + database._REBUILD_COUNTS:
+            conn.execute(statement)
+        conn.execute("INSERT INTO events_fts (events_fts) VALUES ('rebuild')")
+        # The triggers that log new events for the analytics snapshot were dropped
+        # during the load; log them now so an incremental refresh sees them.
+        conn.execute("DELETE FROM event_changes WHERE event_id >= ?", (first_event,))
+        conn.execute("INSERT INTO event_changes (event_id) SELECT id FROM events WHERE id >= ?", (first_event,))
+        conn.commit()
+        conn.execute("ANALYZE")
+        timings["derived"] = time.perf_counter() - started
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fill a Collegia database with synthetic data.")
+    parser.add_argument("--db", default=database.DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--colleges", type=int, default=20)
+    parser.add_argument("--events", type=int, default=5_000)
+    parser.add_argument("--students", type=int, default=50_000)
+    parser.add_argument("--registrations", type=int, default=1_000_000)
+    parser.add_argument("--feedback", type=int, default=200_000)
+    parser.add_argument("--attendance-rate", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    timings = generate(
+        args.db, args.colleges, args.events, args.students,
+        args.registrations, args.feedback, args.attendance_rate, args.seed,
+    )
+    for step, seconds in timings.items():
+        print(f"{step:<18} {seconds:8.2f}s")
+    print(f"{'total':<18} {sum(timings.values()):8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Drive every route of the Collegia API in-process and record latency.
+
+    python -m benchmark.load --db bench.db --requests 500 --concurrency 16
+    python -m benchmark.load --db bench.db --baseline last.json --max-regression 0.25
+
+Each route is first exercised on its own ("plain"), then the app is hit with
+the mixed read/write workloads in WORKLOADS. Requests go through an ASGI
+transport, so no server or network is involved and the numbers reflect the
+app and the database alone. The run writes to the database it is pointed at;
+use a generated copy rather than a real one.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from itertools import count
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi.routing import APIRoute
+
+import analytics
+import database
+from benchmark.generate import EVENT_TYPES, LOCATIONS, TOPICS
+
+Route = Tuple[str, str]
+RequestFactory = Callable[[random.Random], Dict]
+
+# Relative weights of routes in each mixed workload.
+WORKLOADS: Dict[str, Dict[Route, int]] = {
+    "dashboard": {
+        ("GET", "/stats/summary"): 40,
+        ("GET", "/events"): 20,
+        ("GET", "/students"): 10,
+        ("GET", "/reports/registrations"): 5,
+        ("GET", "/reports/attendance"): 5,
+        ("GET", "/reports/feedback"): 5,
+        ("GET", "/reports/top_students"): 5,
+        ("GET", "/events/search"): 5,
+        ("GET", "/analytics"): 5,
+        ("POST", "/register"): 5,
+    },
+    "check_in": {
+        ("PATCH", "/attendance"): 60,
+        ("PATCH", "/attendance/bulk"): 5,
+        ("POST", "/register"): 15,
+        ("GET", "/stats/summary"): 10,
+        ("GET", "/reports/attendance"): 10,
+    },
+    "balanced": {
+        ("GET", "/events"): 15,
+        ("GET", "/events/search"): 15,
+        ("GET", "/reports/event_type"): 10,
+        ("GET", "/stats/summary"): 10,
+        ("POST", "/register"): 15,
+        ("PATCH", "/attendance"): 15,
+        ("POST", "/feedback"): 10,
+        ("POST", "/students"): 5,
+        ("POST", "/events"): 5,
+    },
+}
+
+
+class RequestBuilder:
+    """Builds random but valid requests for every route against the current data."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.max_event = conn.execute("SELECT COALESCE(MAX(id), 1) FROM events").fetchone()[0]
+        self.max_student = conn.execute("SELECT COALESCE(MAX(id), 1) FROM students").fetchone()[0]
+        self.max_college = conn.execute("SELECT COALESCE(MAX(college_id), 1) FROM events").fetchone()[0]
+        self.run = f"{int(time.time())}"
+        self.serial = count()
+
+    def pair(self, rng: random.Random) -> Dict:
+        return {"student_id": rng.randint(1, self.max_student), "event_id": rng.randint(1, self.max_event)}
+
+    def factories(self) -> Dict[Route, RequestFactory]:
+        def get(path, params=lambda rng: {}):
+            return lambda rng: {"method": "GET", "url": path, "params": params(rng)}
+
+        return {
+            ("GET", "/events"): get("/events", lambda rng: {"limit": 100, "after": rng.randint(0, self.max_event)}),
+            ("GET", "/events/search"): get("/events/search", lambda rng: {"q": rng.choice(TOPICS)[:4]}),
+            ("POST", "/events"): lambda rng: {"method": "POST", "url": "/events", "json": {
+                "name": f"{rng.choice(TOPICS)} Meetup",
+                "date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                "location": rng.choice(LOCATIONS),
+                "description": "Benchmark event",
+                "type": rng.choice(EVENT_TYPES),
+                "college_id": rng.randint(1, self.max_college),
+            }},
+            ("GET", "/students"): get("/students", lambda rng: {"limit": 100, "after": rng.randint(0, self.max_student)}),
+            ("POST", "/students"): lambda rng: {"method": "POST", "url": "/students", "json": {
+                "name": "Bench Student",
+                "email": f"bench-{self.run}-{next(self.serial)}@example.edu",
+            }},
+            ("POST", "/register"): lambda rng: {"method": "POST", "url": "/register", "params": self.pair(rng)},
+            ("POST", "/register/bulk"): lambda rng: {
+                "method": "POST", "url": "/register/bulk", "json": [self.pair(rng) for _ in range(50)],
+            },
+            ("PATCH", "/attendance"): lambda rng: {"method": "PATCH", "url": "/attendance", "params": self.pair(rng)},
+            ("PATCH", "/attendance/bulk"): lambda rng: {
+                "method": "PATCH", "url": "/attendance/bulk", "json": [self.pair(rng) for _ in range(50)],
+            },
+            ("POST", "/feedback"): lambda rng: {"method": "POST", "url": "/feedback", "json": {
+                **self.pair(rng), "rating": rng.randint(1, 5), "comments": "Benchmark feedback",
+            }},
+            ("GET", "/reports/registrations"): get("/reports/registrations"),
+            ("GET", "/reports/attendance"): get("/reports/attendance"),
+            ("GET", "/reports/feedback"): get("/reports/feedback"),
+            ("GET", "/reports/top_students"): get(
+                "/reports/top_students", lambda rng: {"college_id": rng.randint(1, self.max_college)}
+            ),
+            ("GET", "/reports/event_type"): get(
+                "/reports/event_type",
+                lambda rng: {"event_type": rng.choice(EVENT_TYPES), "college_id": rng.randint(1, self.max_college)},
+            ),
+            ("GET", "/stats/summary"): get("/stats/summary"),
+            ("GET", "/analytics"): get("/analytics", lambda rng: {
+                "by": rng.choice([["college", "type"], ["type", "period"], ["college", "type", "period"]]),
+                "interval": rng.choice(["week", "month"]),
+            }),
+            ("GET", "/metrics"): get("/metrics"),
+        }
+
+
+def app_routes(app) -> List[Route]:
+    return sorted(
+        (method, route.path)
+        for route in app.routes if isinstance(route, APIRoute)
+        for method in route.methods
+    )
+
+
+def summarize(samples: List[Tuple[Route, float, int]], wall: float) -> Dict:
+    latencies = sorted(seconds * 1000 for _, seconds, _ in samples)
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(samples),
+        "errors": sum(status >= 400 for _, _, status in samples),
+        "throughput_rps": round(len(samples) / wall, 1),
+        "p50_ms": round(cuts[49], 3),
+        "p95_ms": round(cuts[94], 3),
+        "p99_ms": round(cuts[98], 3),
+        "max_ms": round(latencies[-1], 3),
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    pick: Callable[[random.Random], Tuple[Route, RequestFactory]],
+    requests: int,
+    concurrency: int,
+    seed: int,
+) -> Dict:
+    samples: List[Tuple[Route, float, int]] = []
+    remaining = iter(range(requests))
+
+    async def worker(rng: random.Random):
+        for _ in remaining:
+            route, factory = pick(rng)
+            started = time.perf_counter()
+            response = await client.request(**factory(rng))
+            samples.append((route, time.perf_counter() - started, response.status_code))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(random.Random(seed + i)) for i in range(concurrency)))
+    result = summarize(samples, time.perf_counter() - started)
+    routes = sorted({route for route, _, _ in samples})
+    if len(routes) > 1:
+        result["routes"] = {
+            " ".join(route): summarize([s for s in samples if s[0] == route], 1.0) for route in routes
+        }
+        for stats in result["routes"].values():
+            del stats["throughput_rps"]
+    return result
+
+
+async def run(requests: int = 300, concurrency: int = 16, seed: int = 0, only: Optional[List[str]] = None) -> Dict:
+    """Run the plain per-route scenarios and the mixed workloads against database.DB_PATH."""
+    import main
+
+    database.init_db()
+    with database.read_connection() as conn:
+        factories = RequestBuilder(conn).factories()
+    missing = [route for route in app_routes(main.app) if route not in factories]
+    if missing:
+        raise RuntimeError(f"No benchmark request for routes: {missing}")
+
+    scenarios: Dict[str, Tuple[Callable, int]] = {}
+    for route, factory in factories.items():
+        scenarios[" ".join(route)] = (lambda rng, r=route, f=factory: (r, f))
+    for name, weights in WORKLOADS.items():
+        routes, cumulative = list(weights), []
+        for weight in weights.values():
+            cumulative.append((cumulative[-1] if cumulative else 0) + weight)
+        scenarios[f"mixed:{name}"] = (
+            lambda rng, routes=routes, cumulative=cumulative: (
+                lambda route: (route, factories[route])
+            )(rng.choices(routes, cum_weights=cumulative)[0])
+        )
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, pick in scenarios.items():
+            if only and not any(part in name for part in only):
+                continue
+            results[name] = await run_scenario(client, pick, requests, concurrency, seed)
+    analytics.close_engine()
+    database.close_pool()
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "db": database.DB_PATH,
+            "requests": requests,
+            "concurrency": concurrency,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+        },
+        "scenarios": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    """Scenarios whose p95 latency or throughput got worse than allowed."""
+    regressions = []
+    for name, now in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        if now["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {now['p95_ms']}ms")
+        if now["throughput_rps"] < before["throughput_rps"] * (1 - max_regression):
+            regressions.append(f"{name}: throughput {before['throughput_rps']} -> {now['throughput_rps']} rps")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark every Collegia route in-process.")
+    parser.add_argument("--db", default=database.DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--requests", type=int, default=300, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", help="run only scenarios whose name contains one of these")
+    parser.add_argument("--out", default="bench_results.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="allowed relative slowdown before failing (default: %(default)s)")
+    args = parser.parse_args()
+
+    database.DB_PATH = args.db
+    results = asyncio.run(run(args.requests, args.concurrency, args.seed, args.only))
+    with open(args.out, "w") as fh:
+        json.dump(results, fh, indent=2)
+
+    print(f"{'scenario':<32} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}")
+    for name, stats in results["scenarios"].items():
+        print(f"{name:<32} {stats['throughput_rps']:>9} {stats['p50_ms']:>9} "
+              f"{stats['p95_ms']:>9} {stats['p99_ms']:>9} {stats['errors']:>7}")
+    print(f"Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(results, json.load(fh), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Compare the two ways a list endpoint can turn rows into a response.
+
+    python -m benchmark.serialization --rows 100000
+
+"dicts"   -- dict(row) per sqlite3.Row, response_model=List[Dict] validation
+             and FastAPI's JSON encoding: how every list endpoint used to work
+"encoded" -- serializers.encode_cursor straight from the tuples the cursor
+             returns, sent as a ready-made response
+
+Both run as routes of a throwaway FastAPI app over the same in-memory table,
+called in-process, and the bodies are checked to be byte-identical.
+"""
+import argparse
+import asyncio
+import json
+import sqlite3
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+from fastapi import FastAPI, Response
+
+import serializers
+
+
+def _table(rows: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.execute("""
+        CREATE TABLE events (
+            id INTEGER PRIMARY KEY, name TEXT, date TEXT, location TEXT,
+            description TEXT, type TEXT, college_id INTEGER
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            (i, f"Event {i} – Café", f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}", "Main Hall",
+             f"Description of event {i} with \"quotes\"", "Seminar", i % 50)
+            for i in range(1, rows + 1)
+        ),
+    )
+    return conn
+
+
+def build_app(conn: sqlite3.Connection) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/dicts", response_model=List[Dict])
+    def dicts():
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        return [dict(row) for row in cursor.execute("SELECT * FROM events").fetchall()]
+
+    @app.get("/encoded", response_model=List[Dict])
+    def encoded():
+        rows = serializers.encode_cursor(conn.execute("SELECT * FROM events"))
+        return Response(rows.body, media_type="application/json")
+
+    return app
+
+
+async def measure(app: FastAPI, repeat: int) -> Dict[str, Dict]:
+    results, bodies = {}, {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ("/dicts", "/encoded"):
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                response = await client.get(path)
+                timings.append(time.perf_counter() - started)
+            bodies[path] = response.content
+            results[path.strip("/")] = {
+                "median_ms": round(statistics.median(timings) * 1000, 1),
+                "min_ms": round(min(timings) * 1000, 1),
+                "bytes": len(response.content),
+            }
+    if bodies["/dicts"] != bodies["/encoded"]:
+        raise AssertionError("Encoded response differs from the dict path")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark row serialization paths.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(measure(build_app(_table(args.rows)), args.repeat))
+    results["speedup"] = round(results["dicts"]["median_ms"] / results["encoded"]["median_ms"], 2)
+    for name in ("dicts", "encoded"):
+        stats = results[name]
+        print(f"{name:<8} median {stats['median_ms']:>8} ms   min {stats['min_ms']:>8} ms   {stats['bytes']} bytes")
+    print(f"speedup  {results['speedup']}x (bodies identical)")
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump({"rows": args.rows, **results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
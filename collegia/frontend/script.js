@@ -38,31 +38,17 @@ students.forEach(student => {
 }
 
 // ---------------- FETCH STATS ----------------
+// "no-cache" makes the browser revalidate with the ETag; when nothing changed
+// the server answers 304 and the cached numbers are reused.
 async function fetchStats() {
 try {
-    // Events
-    const eventsRes = await fetch(`${baseUrl}/events`);
-    const events = await eventsRes.json();
-    document.getElementById("statEvents").textContent = events.length;
-
-    // Students
-    const studentsRes = await fetch(`${baseUrl}/students`);
-    const students = await studentsRes.json();
-    document.getElementById("statStudents").textContent = students.length;
-
-    // Registrations
-    const regRes = await fetch(`${baseUrl}/reports/registrations`);
-    const registrations = await regRes.json();
-    const totalRegs = registrations.reduce((sum, r) => sum + r.total_registrations, 0);
-    document.getElementById("statRegistrations").textContent = totalRegs;
-
-    // Feedback
-    const feedbackRes = await fetch(`${baseUrl}/reports/feedback`);
-    const feedback = await feedbackRes.json();
-    const avgFeedback = feedback.length
-    ? (feedback.reduce((sum, f) => sum + f.avg_feedback, 0) / feedback.length).toFixed(1)
-    : 0;
-    document.getElementById("statFeedback").textContent = avgFeedback;
+    const res = await fetch(`${baseUrl}/stats/summary`, { cache: "no-cache" });
+    const stats = await res.json();
+    document.getElementById("statEvents").textContent = stats.events;
+    document.getElementById("statStudents").textContent = stats.students;
+    document.getElementById("statRegistrations").textContent = stats.registrations;
+    document.getElementById("statFeedback").textContent =
+    stats.avg_feedback !== null ? stats.avg_feedback.toFixed(1) : 0;
 } catch (err) {
     console.error("Error fetching stats:", err);
 }
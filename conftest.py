@@ -0,0 +1,25 @@
+import pytest
+
+import database
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Point the database module at a fresh, initialised file for one test."""
+    path = str(tmp_path / "collegia.db")
+    database.close_pool()
+    monkeypatch.setattr(database, "DB_PATH", path)
+    database.init_db()
+    yield path
+    database.close_pool()
+
+
+@pytest.fixture
+def client(db_path):
+    """A TestClient for the app, backed by the per-test database."""
+    from fastapi.testclient import TestClient
+
+    import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
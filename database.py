@@ -1,79 +1,734 @@
+import os
+import queue
+import re
 import sqlite3
+import sys
+import threading
+import uuid
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import date, timedelta
 from sqlite3 import Connection
-from typing import List, Dict
+from typing import Iterator, List, Dict, Optional, Sequence, Tuple
+
+import metrics
+import serializers
 
 DB_PATH = "collegia.db"
 
+# Set COLLEGIA_DB_POOL=0 to fall back to one untuned connection per call,
+# which is handy for comparing against the pooled setup.
+POOL_ENABLED = os.environ.get("COLLEGIA_DB_POOL", "1") != "0"
+POOL_SIZE = int(os.environ.get("COLLEGIA_DB_POOL_SIZE", "8"))
+
+# Set COLLEGIA_GROUP_COMMIT=0 to commit every single-row write on its own.
+GROUP_COMMIT_ENABLED = os.environ.get("COLLEGIA_GROUP_COMMIT", "1") != "0"
+GROUP_COMMIT_MAX_BATCH = 512
+
+# Applied once to every pooled connection when it is opened.
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA mmap_size = 268435456",  # 256 MiB
+    "PRAGMA cache_size = -65536",  # 64 MiB
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
 # ---------------- DATABASE CONNECTION ----------------
 def get_connection() -> Connection:
     """
     Returns a SQLite connection object with row_factory set to Row
     so that results can be accessed like dictionaries.
+    The connection is not pooled; the caller is responsible for closing it.
     """
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, factory=metrics.connection_factory())
     conn.row_factory = sqlite3.Row
     return conn
 
-# ---------------- INITIALIZATION ----------------
-def init_db() -> None:
-    """Create tables if they do not exist"""
-    with get_connection() as conn:
+def _connect(path: str, read_only: bool = False) -> Connection:
+    """Open a connection to `path` and apply the tuning pragmas."""
+    conn = sqlite3.connect(path, check_same_thread=False, factory=metrics.connection_factory())
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+class ConnectionPool:
+    """
+    A bounded pool of read connections plus a single writer connection.
+    SQLite only allows one writer at a time, so writes are serialised on a
+    lock instead of racing each other into `database is locked` errors.
+    """
+
+    def __init__(self, path: str, size: int = POOL_SIZE):
+        self.path = path
+        self.size = size
+        self.created = 0
+        self._idle: "queue.LifoQueue[Optional[Connection]]" = queue.LifoQueue()
+        self._waiting = 0
+        self._lock = threading.Lock()
+        self._writer: Optional[Connection] = None
+        self._writer_lock = threading.Lock()
+        self._watcher: Optional[Connection] = None
+        self._watcher_token = ""
+        self._watcher_lock = threading.Lock()
+        self._closed = False
+
+    def _acquire_reader(self) -> Connection:
+        try:
+            return self._checked(self._idle.get_nowait())
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            grow = self.created < self.size
+            if grow:
+                self.created += 1
+            else:
+                self._waiting += 1
+        if not grow:
+            try:
+                return self._checked(self._idle.get())
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+        try:
+            return _connect(self.path, read_only=True)
+        except Exception:
+            with self._lock:
+                self.created -= 1
+            raise
+
+    @staticmethod
+    def _checked(conn: Optional[Connection]) -> Connection:
+        # close() wakes every waiting reader with None.
+        if conn is None:
+            raise RuntimeError("Connection pool is closed")
+        return conn
+
+    def _release_reader(self, conn: Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if self._closed:
+                self.created -= 1
+                conn.close()
+                return
+        self._idle.put(conn)
+
+    @contextmanager
+    def reader(self) -> Iterator[Connection]:
+        """Borrow a read-only connection, blocking while all of them are in use."""
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            self._release_reader(conn)
+
+    @contextmanager
+    def writer(self) -> Iterator[Connection]:
+        """Hold the writer connection; commits on success and rolls back on error."""
+        with self._writer_lock:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            if self._writer is None:
+                self._writer = _connect(self.path)
+            conn = self._writer
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    def change_token(self) -> str:
+        """
+        PRAGMA data_version on a connection that never writes, prefixed with a
+        token for that connection. data_version changes whenever any other
+        connection, in this process or another, commits, but it is only
+        comparable on one connection: a reopened watcher starts counting again.
+        """
+        with self._watcher_lock:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            if self._watcher is None:
+                self._watcher = _connect(self.path, read_only=True)
+                self._watcher_token = uuid.uuid4().hex[:12]
+            version = self._watcher.execute("PRAGMA data_version").fetchone()[0]
+            return f"{self._watcher_token}-{version}"
+
+    def close(self) -> None:
+        """
+        Close every idle connection; borrowed ones are closed when returned.
+        Readers waiting for a connection are woken and get an error.
+        """
+        with self._lock:
+            self._closed = True
+            waiting = self._waiting
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if conn is None:
+                continue
+            with self._lock:
+                self.created -= 1
+            conn.close()
+        for _ in range(waiting):
+            self._idle.put(None)
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._watcher_lock:
+            if self._watcher is not None:
+                self._watcher.close()
+                self._watcher = None
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide pool for DB_PATH, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.path != DB_PATH:
+            _pool.close()
+            _pool = None
+        if _pool is None:
+            _pool = ConnectionPool(DB_PATH)
+        return _pool
+
+def close_pool() -> None:
+    """Close all pooled connections. Called on application shutdown."""
+    global _pool
+    _write_queue.stop()
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+def change_token() -> str:
+    """An opaque token that changes whenever the database content changes."""
+    return get_pool().change_token()
+
+@contextmanager
+def read_connection() -> Iterator[Connection]:
+    """Context manager yielding a connection for read-only queries."""
+    if not POOL_ENABLED:
+        conn = get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+    with get_pool().reader() as conn:
+        yield conn
+
+@contextmanager
+def stream_connection() -> Iterator[Connection]:
+    """
+    A read-only connection of its own for streamed responses. A stream holds
+    its connection for as long as the client takes to read it, so streams stay
+    out of the bounded pool and cannot starve the other read endpoints.
+    """
+    conn = _connect(DB_PATH, read_only=True) if POOL_ENABLED else get_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+@contextmanager
+def write_connection() -> Iterator[Connection]:
+    """Context manager yielding a connection for writes; commits on exit."""
+    if not POOL_ENABLED:
+        conn = get_connection()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+        return
+    with get_pool().writer() as conn:
+        yield conn
+
+# ---------------- GROUP COMMIT ----------------
+class WriteQueue:
+    """
+    Single writer thread that applies queued single-row writes in batches.
+    Whatever piles up while one transaction commits goes into the next one,
+    so concurrent writers share a commit instead of paying one each.
+    """
+
+    def __init__(self):
+        self._queue: Optional["queue.Queue[Optional[Tuple[str, Sequence, Future]]]"] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, sql: str, params: Sequence) -> "Future[int]":
+        """Queue one statement; the future resolves to its rowcount once committed."""
+        future: "Future[int]" = Future()
+        with self._lock:
+            if self._thread is None:
+                # Every writer thread gets a queue of its own, so a thread that
+                # is still stopping never picks up writes meant for its successor.
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name="collegia-writer", daemon=True
+                )
+                self._thread.start()
+            self._queue.put((sql, params, future))
+        return future
+
+    def stop(self) -> None:
+        """Flush pending writes and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            pending, self._queue = self._queue, None
+            if thread is None:
+                return
+            pending.put(None)
+        thread.join()
+
+    def _run(self, pending: "queue.Queue[Optional[Tuple[str, Sequence, Future]]]") -> None:
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            batch = [item]
+            stopping = False
+            while len(batch) < GROUP_COMMIT_MAX_BATCH:
+                try:
+                    item = pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._apply(batch)
+            if stopping:
+                return
+
+    @staticmethod
+    def _apply(batch: List[Tuple[str, Sequence, Future]]) -> None:
+        results = []
+        try:
+            with write_connection() as conn:
+                for sql, params, future in batch:
+                    try:
+                        results.append((future, conn.execute(sql, params).rowcount, None))
+                    except sqlite3.Error as exc:
+                        # SQLite only rolls back the failing statement.
+                        results.append((future, None, exc))
+        except Exception as exc:
+            for _, _, future in batch:
+                future.set_exception(exc)
+            return
+        for future, rowcount, exc in results:
+            if exc is None:
+                future.set_result(rowcount)
+            else:
+                future.set_exception(exc)
+
+_write_queue = WriteQueue()
+
+def execute_write(sql: str, params: Sequence = ()) -> int:
+    """Run a single-row write, group-committed with concurrent ones, and return its rowcount."""
+    if not GROUP_COMMIT_ENABLED:
+        with write_connection() as conn:
+            return conn.execute(sql, params).rowcount
+    return _write_queue.submit(sql, params).result()
+
+def execute_bulk(sql: str, rows: Sequence[Sequence]) -> List[int]:
+    """
+    Run `sql` once per parameter row inside a single transaction and return
+    the rowcount of each. The statement is prepared once and reused.
+    """
+    with write_connection() as conn:
         cursor = conn.cursor()
+        return [cursor.execute(sql, params).rowcount for params in rows]
 
-        # Events table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                date TEXT NOT NULL,
-                location TEXT,
-                description TEXT,
-                type TEXT,
-                college_id INTEGER
-            )
-        """)
+# ---------------- REPORT SUMMARIES ----------------
+# Per-event and per-student counters that the report endpoints read instead of
+# re-aggregating registrations/feedback. Triggers keep them in step with every
+# write, whichever code path it comes from.
+SUMMARY_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS event_stats (
+        event_id INTEGER PRIMARY KEY,
+        registrations INTEGER NOT NULL DEFAULT 0,
+        attended INTEGER NOT NULL DEFAULT 0,
+        rating_sum INTEGER NOT NULL DEFAULT 0,
+        rating_count INTEGER NOT NULL DEFAULT 0
+    );
 
-        # Students table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS students (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL
-            )
-        """)
+    CREATE TABLE IF NOT EXISTS student_stats (
+        student_id INTEGER PRIMARY KEY,
+        registrations INTEGER NOT NULL DEFAULT 0,
+        attended INTEGER NOT NULL DEFAULT 0
+    );
 
-        # Registrations table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS registrations (
-                student_id INTEGER,
-                event_id INTEGER,
-                attended INTEGER DEFAULT 0,
-                PRIMARY KEY (student_id, event_id),
-                FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE,
-                FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
-            )
-        """)
+    CREATE INDEX IF NOT EXISTS idx_student_stats_registrations
+        ON student_stats (registrations DESC, student_id);
 
-        # Feedback table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS feedback (
-                student_id INTEGER,
-                event_id INTEGER,
-                rating INTEGER CHECK(rating BETWEEN 1 AND 5),
-                comments TEXT,
-                PRIMARY KEY (student_id, event_id),
-                FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE,
-                FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+    CREATE TRIGGER IF NOT EXISTS registrations_stats_insert AFTER INSERT ON registrations
+    BEGIN
+        INSERT INTO event_stats (event_id, registrations, attended)
+        VALUES (NEW.event_id, 1, COALESCE(NEW.attended, 0))
+        ON CONFLICT (event_id) DO UPDATE SET
+            registrations = registrations + 1,
+            attended = attended + excluded.attended;
+        INSERT INTO student_stats (student_id, registrations, attended)
+        VALUES (NEW.student_id, 1, COALESCE(NEW.attended, 0))
+        ON CONFLICT (student_id) DO UPDATE SET
+            registrations = registrations + 1,
+            attended = attended + excluded.attended;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS registrations_stats_delete AFTER DELETE ON registrations
+    BEGIN
+        UPDATE event_stats SET
+            registrations = registrations - 1,
+            attended = attended - COALESCE(OLD.attended, 0)
+        WHERE event_id = OLD.event_id;
+        UPDATE student_stats SET
+            registrations = registrations - 1,
+            attended = attended - COALESCE(OLD.attended, 0)
+        WHERE student_id = OLD.student_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS registrations_stats_update
+    AFTER UPDATE OF student_id, event_id, attended ON registrations
+    BEGIN
+        UPDATE event_stats SET
+            registrations = registrations - 1,
+            attended = attended - COALESCE(OLD.attended, 0)
+        WHERE event_id = OLD.event_id;
+        UPDATE student_stats SET
+            registrations = registrations - 1,
+            attended = attended - COALESCE(OLD.attended, 0)
+        WHERE student_id = OLD.student_id;
+        INSERT INTO event_stats (event_id, registrations, attended)
+        VALUES (NEW.event_id, 1, COALESCE(NEW.attended, 0))
+        ON CONFLICT (event_id) DO UPDATE SET
+            registrations = registrations + 1,
+            attended = attended + excluded.attended;
+        INSERT INTO student_stats (student_id, registrations, attended)
+        VALUES (NEW.student_id, 1, COALESCE(NEW.attended, 0))
+        ON CONFLICT (student_id) DO UPDATE SET
+            registrations = registrations + 1,
+            attended = attended + excluded.attended;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS feedback_stats_insert AFTER INSERT ON feedback
+    BEGIN
+        INSERT INTO event_stats (event_id, rating_sum, rating_count)
+        VALUES (NEW.event_id, COALESCE(NEW.rating, 0), NEW.rating IS NOT NULL)
+        ON CONFLICT (event_id) DO UPDATE SET
+            rating_sum = rating_sum + excluded.rating_sum,
+            rating_count = rating_count + excluded.rating_count;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS feedback_stats_delete AFTER DELETE ON feedback
+    BEGIN
+        UPDATE event_stats SET
+            rating_sum = rating_sum - COALESCE(OLD.rating, 0),
+            rating_count = rating_count - (OLD.rating IS NOT NULL)
+        WHERE event_id = OLD.event_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS feedback_stats_update AFTER UPDATE OF event_id, rating ON feedback
+    BEGIN
+        UPDATE event_stats SET
+            rating_sum = rating_sum - COALESCE(OLD.rating, 0),
+            rating_count = rating_count - (OLD.rating IS NOT NULL)
+        WHERE event_id = OLD.event_id;
+        INSERT INTO event_stats (event_id, rating_sum, rating_count)
+        VALUES (NEW.event_id, COALESCE(NEW.rating, 0), NEW.rating IS NOT NULL)
+        ON CONFLICT (event_id) DO UPDATE SET
+            rating_sum = rating_sum + excluded.rating_sum,
+            rating_count = rating_count + excluded.rating_count;
+    END;
+"""
+
+# Row totals for tables the dashboard counts, so it never has to scan them.
+COUNT_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS table_counts (
+        name TEXT PRIMARY KEY,
+        total INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID;
+
+    CREATE TRIGGER IF NOT EXISTS events_count_insert AFTER INSERT ON events
+    BEGIN
+        UPDATE table_counts SET total = total + 1 WHERE name = 'events';
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS events_count_delete AFTER DELETE ON events
+    BEGIN
+        UPDATE table_counts SET total = total - 1 WHERE name = 'events';
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS students_count_insert AFTER INSERT ON students
+    BEGIN
+        UPDATE table_counts SET total = total + 1 WHERE name = 'students';
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS students_count_delete AFTER DELETE ON students
+    BEGIN
+        UPDATE table_counts SET total = total - 1 WHERE name = 'students';
+    END;
+"""
+
+_EXPECTED_COUNTS = """
+    SELECT 'events', COUNT(*) FROM events UNION ALL SELECT 'students', COUNT(*) FROM students
+"""
+
+_REBUILD_COUNTS = (
+    f"INSERT OR REPLACE INTO table_counts (name, total) {_EXPECTED_COUNTS}",
+)
+
+# The same numbers computed from scratch, as (key, counters...) rows.
+_EXPECTED_EVENT_REGISTRATIONS = """
+    SELECT event_id, COUNT(*), COALESCE(SUM(attended), 0) FROM registrations GROUP BY event_id
+"""
+_EXPECTED_EVENT_RATINGS = """
+    SELECT event_id, COALESCE(SUM(rating), 0), COUNT(rating) FROM feedback GROUP BY event_id
+"""
+_EXPECTED_STUDENTS = """
+    SELECT student_id, COUNT(*), COALESCE(SUM(attended), 0) FROM registrations GROUP BY student_id
+"""
+
+_REBUILD_SUMMARIES = (
+    "DELETE FROM event_stats",
+    "DELETE FROM student_stats",
+    f"INSERT INTO event_stats (event_id, registrations, attended) {_EXPECTED_EVENT_REGISTRATIONS}",
+    f"""
+        INSERT INTO event_stats (event_id, rating_sum, rating_count)
+        SELECT * FROM ({_EXPECTED_EVENT_RATINGS}) WHERE true
+        ON CONFLICT (event_id) DO UPDATE SET
+            rating_sum = excluded.rating_sum,
+            rating_count = excluded.rating_count
+    """,
+    f"INSERT INTO student_stats (student_id, registrations, attended) {_EXPECTED_STUDENTS}",
+)
+
+def rebuild_summaries() -> None:
+    """Recompute event_stats, student_stats and table_counts from the base tables."""
+    with write_connection() as conn:
+        for statement in _REBUILD_SUMMARIES + _REBUILD_COUNTS:
+            conn.execute(statement)
+
+def verify_summaries() -> List[Dict]:
+    """
+    Recompute the summaries from scratch and compare them with the maintained
+    tables. Returns one entry per mismatching row; an empty list means in sync.
+    """
+    with read_connection() as conn:
+        expected_events: Dict[int, list] = {}
+        for event_id, registrations, attended in conn.execute(_EXPECTED_EVENT_REGISTRATIONS):
+            expected_events[event_id] = [registrations, attended, 0, 0]
+        for event_id, rating_sum, rating_count in conn.execute(_EXPECTED_EVENT_RATINGS):
+            expected_events.setdefault(event_id, [0, 0, 0, 0])[2:] = [rating_sum, rating_count]
+        expected_students = {row[0]: list(row[1:]) for row in conn.execute(_EXPECTED_STUDENTS)}
+        actual_events = {
+            row[0]: list(row[1:]) for row in conn.execute(
+                "SELECT event_id, registrations, attended, rating_sum, rating_count FROM event_stats"
             )
-        """)
+        }
+        actual_students = {
+            row[0]: list(row[1:]) for row in conn.execute(
+                "SELECT student_id, registrations, attended FROM student_stats"
+            )
+        }
+        expected_counts = {row[0]: [row[1]] for row in conn.execute(_EXPECTED_COUNTS)}
+        actual_counts = {row[0]: [row[1]] for row in conn.execute("SELECT name, total FROM table_counts")}
+
+    diffs = []
+    for table, expected, actual in (
+        ("event_stats", expected_events, actual_events),
+        ("student_stats", expected_students, actual_students),
+        ("table_counts", expected_counts, actual_counts),
+    ):
+        for key in sorted(expected.keys() | actual.keys()):
+            want = expected.get(key)
+            have = actual.get(key)
+            # Rows whose counters have all dropped back to zero are harmless.
+            if want is None and have is not None and not any(have):
+                continue
+            if want != have:
+                diffs.append({"table": table, "id": key, "expected": want, "actual": have})
+    return diffs
+
+# ---------------- MIGRATIONS ----------------
+BASE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        date TEXT NOT NULL,
+        location TEXT,
+        description TEXT,
+        type TEXT,
+        college_id INTEGER
+    );
+
+    CREATE TABLE IF NOT EXISTS students (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS registrations (
+        student_id INTEGER,
+        event_id INTEGER,
+        attended INTEGER DEFAULT 0,
+        PRIMARY KEY (student_id, event_id),
+        FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE,
+        FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+    );
+
+    CREATE TABLE IF NOT EXISTS feedback (
+        student_id INTEGER,
+        event_id INTEGER,
+        rating INTEGER CHECK(rating BETWEEN 1 AND 5),
+        comments TEXT,
+        PRIMARY KEY (student_id, event_id),
+        FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE,
+        FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+    );
+"""
+
+# Access paths for the event-centric reports and the college/date/type filters.
+EVENT_INDEXES = """
+    CREATE INDEX IF NOT EXISTS idx_registrations_event ON registrations (event_id, attended);
+    CREATE INDEX IF NOT EXISTS idx_feedback_event ON feedback (event_id, rating);
+    CREATE INDEX IF NOT EXISTS idx_events_college ON events (college_id);
+    CREATE INDEX IF NOT EXISTS idx_events_type ON events (type);
+    CREATE INDEX IF NOT EXISTS idx_events_date ON events (date);
+"""
+
+# Full-text index over the searchable event columns. It is an external-content
+# table, so it stores only the index and reads text back from `events`.
+EVENT_SEARCH_SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+        name, description, location,
+        content = 'events', content_rowid = 'id',
+        prefix = '2 3', tokenize = 'unicode61 remove_diacritics 2'
+    );
+
+    -- Matches in the name count most, then location, then description.
+    INSERT INTO events_fts (events_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 3.0)');
 
-        conn.commit()
+    CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events
+    BEGIN
+        INSERT INTO events_fts (rowid, name, description, location)
+        VALUES (NEW.id, NEW.name, NEW.description, NEW.location);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events
+    BEGIN
+        INSERT INTO events_fts (events_fts, rowid, name, description, location)
+        VALUES ('delete', OLD.id, OLD.name, OLD.description, OLD.location);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS events_fts_update AFTER UPDATE OF name, description, location ON events
+    BEGIN
+        INSERT INTO events_fts (events_fts, rowid, name, description, location)
+        VALUES ('delete', OLD.id, OLD.name, OLD.description, OLD.location);
+        INSERT INTO events_fts (rowid, name, description, location)
+        VALUES (NEW.id, NEW.name, NEW.description, NEW.location);
+    END;
+
+    INSERT INTO events_fts (events_fts) VALUES ('rebuild');
+"""
+
+# The events whose analytics inputs (dimensions or event_stats counters) have
+# changed, each stamped with an ever-increasing sequence number so that a
+# snapshot can catch up by reading only what changed after the last one it saw.
+ANALYTICS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS event_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_id INTEGER NOT NULL UNIQUE
+    );
+
+    CREATE TRIGGER IF NOT EXISTS events_changes_insert AFTER INSERT ON events
+    BEGIN
+        DELETE FROM event_changes WHERE event_id = NEW.id;
+        INSERT INTO event_changes (event_id) VALUES (NEW.id);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS events_changes_update AFTER UPDATE OF id, date, type, college_id ON events
+    BEGIN
+        DELETE FROM event_changes WHERE event_id = OLD.id;
+        INSERT INTO event_changes (event_id) VALUES (OLD.id);
+        DELETE FROM event_changes WHERE event_id = NEW.id;
+        INSERT INTO event_changes (event_id) VALUES (NEW.id);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS events_changes_delete AFTER DELETE ON events
+    BEGIN
+        DELETE FROM event_changes WHERE event_id = OLD.id;
+        INSERT INTO event_changes (event_id) VALUES (OLD.id);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS event_stats_changes_insert AFTER INSERT ON event_stats
+    BEGIN
+        DELETE FROM event_changes WHERE event_id = NEW.event_id;
+        INSERT INTO event_changes (event_id) VALUES (NEW.event_id);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS event_stats_changes_update AFTER UPDATE ON event_stats
+    BEGIN
+        DELETE FROM event_changes WHERE event_id = NEW.event_id;
+        INSERT INTO event_changes (event_id) VALUES (NEW.event_id);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS event_stats_changes_delete AFTER DELETE ON event_stats
+    BEGIN
+        DELETE FROM event_changes WHERE event_id = OLD.event_id;
+        INSERT INTO event_changes (event_id) VALUES (OLD.event_id);
+    END;
+"""
+
+# Applied in order; PRAGMA user_version records how many have run. Scripts are
+# idempotent so that two processes racing through startup do no harm, and so
+# that databases created before migrations existed are adopted as-is.
+MIGRATIONS: List[Tuple[str, str]] = [
+    ("base tables", BASE_SCHEMA),
+    ("report summaries", SUMMARY_SCHEMA + ";\n".join(_REBUILD_SUMMARIES) + ";"),
+    ("event indexes", EVENT_INDEXES),
+    ("table counts", COUNT_SCHEMA + ";\n".join(_REBUILD_COUNTS) + ";"),
+    ("event search", EVENT_SEARCH_SCHEMA),
+    ("analytics change log", ANALYTICS_SCHEMA),
+]
+
+def schema_version(conn: Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate() -> int:
+    """Apply any pending migrations and return the resulting schema version."""
+    with write_connection() as conn:
+        for version, (name, script) in enumerate(MIGRATIONS, start=1):
+            if schema_version(conn) >= version:
+                continue
+            conn.executescript(f"BEGIN IMMEDIATE;\n{script}\nPRAGMA user_version = {version};\nCOMMIT;")
+            print(f"Applied migration {version}: {name}")
+        return schema_version(conn)
+
+# ---------------- INITIALIZATION ----------------
+def init_db() -> None:
+    """Bring the database schema up to date"""
+    migrate()
     print("Database initialized successfully.")
 
 # ---------------- DUMMY DATA ----------------
 def insert_dummy_data() -> None:
     """Insert some sample events, students, registrations, and feedback"""
-    with get_connection() as conn:
+    with write_connection() as conn:
         cursor = conn.cursor()
 
         # Events
@@ -98,22 +753,264 @@ def insert_dummy_data() -> None:
         # Feedback
         cursor.execute("INSERT OR IGNORE INTO feedback (student_id, event_id, rating, comments) VALUES (1, 1, 5, 'Great event!')")
         cursor.execute("INSERT OR IGNORE INTO feedback (student_id, event_id, rating, comments) VALUES (2, 1, 4, 'Informative session')")
-
-        conn.commit()
     print("Dummy data inserted successfully.")
 
 # ---------------- FETCH FUNCTIONS ----------------
-def fetch_all_events() -> List[Dict]:
-    with get_connection() as conn:
-        rows = conn.execute("SELECT * FROM events").fetchall()
-    return [dict(row) for row in rows]
+# Lists are paged by keyset on `id`: pass the last id you saw as `after`.
+STREAM_BATCH_SIZE = 500
+
+def _event_filters(
+    college_id: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    prefix: str = "",
+) -> Tuple[List[str], list]:
+    """WHERE clauses and parameters for the college/date filters on events."""
+    clauses, params = [], []
+    if college_id is not None:
+        clauses.append(f"{prefix}college_id = ?")
+        params.append(college_id)
+    if date_from is not None:
+        clauses.append(f"{prefix}date >= ?")
+        params.append(date_from)
+    if date_to is not None and date.fromisoformat(date_to) < date.max:
+        # Whole day inclusive: dates are free-form text, so "2025-09-10T18:00"
+        # sorts after "2025-09-10" but still belongs to it. 9999-12-31 has no
+        # next day and bounds nothing.
+        clauses.append(f"{prefix}date < ?")
+        params.append((date.fromisoformat(date_to) + timedelta(days=1)).isoformat())
+    return clauses, params
+
+def _page_query(table: str, after: int, limit: Optional[int], clauses=(), params=()):
+    where = " AND ".join(["id > ?", *clauses])
+    sql = f"SELECT * FROM {table} WHERE {where} ORDER BY id"
+    params = (after, *params)
+    if limit is not None:
+        sql += " LIMIT ?"
+        params += (limit,)
+    return sql, params
 
-def fetch_all_students() -> List[Dict]:
-    with get_connection() as conn:
-        rows = conn.execute("SELECT * FROM students").fetchall()
+def _fetch_page(sql: str, params: tuple, as_json: bool = False):
+    """
+    Run a query and return its rows as dicts, or with as_json=True as
+    serializers.EncodedRows ready to send, without building any dicts.
+    """
+    with read_connection() as conn:
+        if as_json:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            return serializers.encode_cursor(cursor.execute(sql, params))
+        rows = conn.execute(sql, params).fetchall()
     return [dict(row) for row in rows]
 
+def _iter_rows(sql: str, params: tuple, as_json: bool = False) -> Iterator:
+    """Yield rows as dicts, or with as_json=True as batches of NDJSON lines."""
+    with stream_connection() as conn:
+        cursor = conn.cursor()
+        if as_json:
+            cursor.row_factory = None
+            yield from serializers.ndjson_lines(cursor.execute(sql, params), STREAM_BATCH_SIZE)
+            return
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(row)
+
+# Functions taking `as_json` return serializers.EncodedRows (or NDJSON text
+# for the iter_* ones) instead of dicts when it is set.
+def fetch_all_events(after: int = 0, limit: Optional[int] = None, as_json: bool = False, **filters):
+    return _fetch_page(*_page_query("events", after, limit, *_event_filters(**filters)), as_json)
+
+def fetch_all_students(after: int = 0, limit: Optional[int] = None, as_json: bool = False):
+    return _fetch_page(*_page_query("students", after, limit), as_json)
+
+def iter_events(after: int = 0, limit: Optional[int] = None, as_json: bool = False, **filters) -> Iterator:
+    """Yield events one by one straight off the cursor, in id order."""
+    return _iter_rows(*_page_query("events", after, limit, *_event_filters(**filters)), as_json)
+
+def iter_students(after: int = 0, limit: Optional[int] = None, as_json: bool = False) -> Iterator:
+    """Yield students one by one straight off the cursor, in id order."""
+    return _iter_rows(*_page_query("students", after, limit), as_json)
+
+def fetch_registrations() -> List[Dict]:
+    return _fetch_page("SELECT * FROM registrations ORDER BY student_id, event_id", ())
+
+def fetch_feedback() -> List[Dict]:
+    return _fetch_page("SELECT * FROM feedback ORDER BY student_id, event_id", ())
+
+def fetch_events_by_type(event_type: str, as_json: bool = False, **filters):
+    clauses, params = _event_filters(**filters)
+    where = " AND ".join(["type = ?", *clauses])
+    return _fetch_page(f"SELECT * FROM events WHERE {where} ORDER BY id", (event_type, *params), as_json)
+
+# ---------------- SEARCH ----------------
+_SEARCH_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+def _match_expression(text: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query: every word is quoted, so user input can
+    never be parsed as FTS syntax, and prefix-matched, so "pyth work" finds
+    "Python Workshop". Prefixes start at two characters, the shortest the
+    prefix index covers; a single character only matches that exact word.
+    """
+    tokens = _SEARCH_TOKEN.findall(text)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' if len(token) > 1 else f'"{token}"' for token in tokens)
+
+def search_events(
+    text: str,
+    event_type: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+    as_json: bool = False,
+    **filters,
+):
+    """Events matching `text`, best BM25 match first, with a highlighted snippet."""
+    match = _match_expression(text)
+    if match is None:
+        return serializers.EncodedRows(b"[]", 0, (), None) if as_json else []
+    clauses, params = _event_filters(**filters, prefix="e.")
+    if event_type is not None:
+        clauses.append("e.type = ?")
+        params.append(event_type)
+    where = " AND ".join(["events_fts MATCH ?", *clauses])
+    return _fetch_page(f"""
+        SELECT e.*, snippet(events_fts, -1, '<mark>', '</mark>', '…', 12) AS snippet
+        FROM events_fts
+        JOIN events e ON e.id = events_fts.rowid
+        WHERE {where}
+        ORDER BY rank
+        LIMIT ? OFFSET ?
+    """, (match, *params, limit, offset), as_json)
+
+# ---------------- REPORTS ----------------
+# All report functions accept the college_id/date_from/date_to filters. Without
+# them they read event_stats alone; with them they join the matching events.
+def _event_report(columns: str, condition: str, as_json: bool = False, **filters):
+    clauses, params = _event_filters(**filters, prefix="e.")
+    if clauses:
+        where = " AND ".join([condition, *clauses])
+        sql = f"""
+            SELECT {columns} FROM events e
+            JOIN event_stats ON event_stats.event_id = e.id
+            WHERE {where} ORDER BY event_stats.event_id
+        """
+    else:
+        sql = f"SELECT {columns} FROM event_stats WHERE {condition} ORDER BY event_id"
+    return _fetch_page(sql, tuple(params), as_json)
+
+def fetch_registrations_report(as_json: bool = False, **filters):
+    return _event_report(
+        "event_stats.event_id, registrations AS total_registrations",
+        "registrations > 0", as_json, **filters,
+    )
+
+def fetch_attendance_report(as_json: bool = False, **filters):
+    return _event_report(
+        "event_stats.event_id, ROUND(attended*100.0/registrations,2) AS attendance_percentage",
+        "registrations > 0", as_json, **filters,
+    )
+
+def fetch_feedback_report(as_json: bool = False, **filters):
+    return _event_report(
+        "event_stats.event_id, ROUND(rating_sum*1.0/rating_count,2) AS avg_feedback",
+        "rating_count > 0", as_json, **filters,
+    )
+
+def fetch_top_students(limit: int = 3, as_json: bool = False, **filters):
+    clauses, params = _event_filters(**filters, prefix="e.")
+    if not clauses:
+        return _fetch_page("""
+            SELECT s.name, student_stats.registrations AS events_attended
+            FROM student_stats
+            JOIN students s ON s.id = student_stats.student_id
+            WHERE student_stats.registrations > 0
+            ORDER BY student_stats.registrations DESC, student_stats.student_id
+            LIMIT ?
+        """, (limit,), as_json)
+    # Per-college/date rankings cannot use the global student totals.
+    return _fetch_page(f"""
+        SELECT s.name, COUNT(*) AS events_attended
+        FROM events e
+        JOIN registrations r ON r.event_id = e.id
+        JOIN students s ON s.id = r.student_id
+        WHERE {" AND ".join(clauses)}
+        GROUP BY r.student_id
+        ORDER BY events_attended DESC, r.student_id
+        LIMIT ?
+    """, (*params, limit), as_json)
+
+# ---------------- DASHBOARD ----------------
+def fetch_stats_summary() -> Dict:
+    """Every number the dashboard shows, in a single query."""
+    with read_connection() as conn:
+        row = conn.execute("""
+            SELECT
+                (SELECT total FROM table_counts WHERE name = 'events') AS events,
+                (SELECT total FROM table_counts WHERE name = 'students') AS students,
+                (SELECT COALESCE(SUM(registrations), 0) FROM event_stats) AS registrations,
+                (SELECT ROUND(AVG(ROUND(rating_sum*1.0/rating_count,2)),2)
+                 FROM event_stats WHERE rating_count > 0) AS avg_feedback
+        """).fetchone()
+    return dict(row)
+
+# ---------------- ANALYTICS ----------------
+# Every analytics dimension is an attribute of the event, so the snapshot needs
+# one row per event: its dimensions plus the event_stats counters.
+_EVENT_MEASURES = """
+    SELECT {id} AS event_id, e.id IS NOT NULL AS live, e.college_id, e.type, e.date,
+        COALESCE(s.registrations, 0), COALESCE(s.attended, 0),
+        COALESCE(s.rating_sum, 0), COALESCE(s.rating_count, 0)
+    FROM {source}
+    LEFT JOIN event_stats s ON s.event_id = {id}
+"""
+
+def fetch_event_measures(since: Optional[int] = None) -> Tuple[int, int, List[tuple]]:
+    """
+    Per-event dimensions and counters for the analytics snapshot, together
+    with the change sequence they are current as of and the number of events.
+    With `since`, only events changed after that sequence are returned;
+    deleted ones have live = 0.
+    """
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        # One read transaction, so the sequence, the count and the rows all
+        # describe the same state; the connection rolls it back when released.
+        cursor.execute("BEGIN")
+        seq = cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM event_changes").fetchone()[0]
+        events = cursor.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        if since is None:
+            sql = _EVENT_MEASURES.format(id="e.id", source="events e")
+            rows = cursor.execute(sql).fetchall()
+        else:
+            sql = _EVENT_MEASURES.format(
+                id="c.event_id", source="event_changes c LEFT JOIN events e ON e.id = c.event_id"
+            ) + " WHERE c.seq > ?"
+            rows = cursor.execute(sql, (since,)).fetchall()
+    return seq, events, rows
+
 # ---------------- MAIN ----------------
 if __name__ == "__main__":
+    # python database.py [init | rebuild-summaries | verify-summaries]
+    command = sys.argv[1] if len(sys.argv) > 1 else "init"
     init_db()
-    insert_dummy_data()
+    if command == "init":
+        insert_dummy_data()
+    elif command == "rebuild-summaries":
+        rebuild_summaries()
+        print("Summaries rebuilt.")
+    elif command == "verify-summaries":
+        diffs = verify_summaries()
+        for diff in diffs:
+            print(diff)
+        print(f"{len(diffs)} summary rows out of sync.")
+        close_pool()
+        sys.exit(1 if diffs else 0)
+    else:
+        sys.exit(f"Unknown command: {command}")
+    close_pool()
@@ -1,11 +1,28 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from datetime import date
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
+import analytics
 import database
-from typing import List, Dict
+import metrics
+import serializers
+from typing import Dict, Iterator, List, Literal, Optional
+
+MAX_PAGE_SIZE = 1000
+MAX_BULK_SIZE = 5000
+MAX_SEARCH_RESULTS = 100
 
 # ---------------- FastAPI App ----------------
-app = FastAPI(title="Collegia - College Event Manager")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    database.init_db()
+    yield
+    analytics.close_engine()
+    database.close_pool()
+
+app = FastAPI(title="Collegia - College Event Manager", lifespan=lifespan)
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -16,6 +33,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request timings for /metrics; a no-op unless COLLEGIA_METRICS=1
+app.add_middleware(metrics.MetricsMiddleware)
+
 # ---------------- Models ----------------
 class Event(BaseModel):
     name: str
@@ -35,122 +55,191 @@ class Feedback(BaseModel):
     rating: int
     comments: str
 
+class RegistrationItem(BaseModel):
+    student_id: int
+    event_id: int
+
+# ---------------- SQL ----------------
+REGISTER_SQL = "INSERT OR IGNORE INTO registrations (student_id, event_id, attended) VALUES (?, ?, 0)"
+ATTENDANCE_SQL = "UPDATE registrations SET attended = 1 WHERE student_id = ? AND event_id = ?"
+
+# ---------------- FILTERS ----------------
+def event_filters(
+    college_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> Dict:
+    """Common college and date-range filters for event lists and reports."""
+    return {
+        "college_id": college_id,
+        "date_from": date_from.isoformat() if date_from else None,
+        "date_to": date_to.isoformat() if date_to else None,
+    }
+
+# ---------------- RESPONSES ----------------
+# List endpoints hand back rows that database already encoded to JSON (see
+# serializers), so FastAPI neither validates them against response_model nor
+# encodes them again. response_model stays on the routes for the API docs.
+class JSONBytesResponse(Response):
+    media_type = "application/json"
+
+def json_rows(rows: serializers.EncodedRows) -> JSONBytesResponse:
+    return JSONBytesResponse(rows.body)
+
+def ndjson(lines: Iterator[str]) -> StreamingResponse:
+    """Stream rows as newline-delimited JSON without materialising the list."""
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+def paginate(rows: serializers.EncodedRows, limit: Optional[int]) -> JSONBytesResponse:
+    """Advertise the cursor for the next page when this one came back full."""
+    response = json_rows(rows)
+    if limit is not None and rows.count == limit:
+        response.headers["X-Next-After"] = str(rows.last("id"))
+    return response
+
 # ---------------- CRUD EVENTS ----------------
 @app.get("/events", response_model=List[Dict])
-def get_events():
-    return database.fetch_all_events()
+def get_events(
+    after: int = 0,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    filters: Dict = Depends(event_filters),
+):
+    if stream:
+        return ndjson(database.iter_events(after, limit, as_json=True, **filters))
+    return paginate(database.fetch_all_events(after, limit, as_json=True, **filters), limit)
+
+@app.get("/events/search", response_model=List[Dict])
+def search_events(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_RESULTS),
+    offset: int = Query(0, ge=0),
+    filters: Dict = Depends(event_filters),
+):
+    return json_rows(database.search_events(q, event_type=type, limit=limit, offset=offset, as_json=True, **filters))
 
 @app.post("/events")
 def create_event(event: Event):
-    with database.get_connection() as conn:
+    with database.write_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             "INSERT INTO events (name, date, location, description, type, college_id) VALUES (?, ?, ?, ?, ?, ?)",
             (event.name, event.date, event.location, event.description, event.type, event.college_id)
         )
-        conn.commit()
         event_id = cursor.lastrowid
     return {**event.dict(), "id": event_id, "message": "Event created successfully"}
 
 # ---------------- CRUD STUDENTS ----------------
 @app.get("/students", response_model=List[Dict])
-def get_students():
-    return database.fetch_all_students()
+def get_students(
+    after: int = 0,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+):
+    if stream:
+        return ndjson(database.iter_students(after, limit, as_json=True))
+    return paginate(database.fetch_all_students(after, limit, as_json=True), limit)
 
 @app.post("/students")
 def create_student(student: Student):
-    with database.get_connection() as conn:
+    with database.write_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("INSERT INTO students (name, email) VALUES (?, ?)", (student.name, student.email))
-        conn.commit()
         student_id = cursor.lastrowid
     return {"id": student_id, **student.dict(), "message": "Student created successfully"}
 
 # ---------------- REGISTRATION ----------------
+def apply_bulk(sql: str, items: List[RegistrationItem], statuses: tuple) -> List[Dict]:
+    """Apply `sql` to every item in one transaction; statuses = (if unchanged, if changed)."""
+    if len(items) > MAX_BULK_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_SIZE} items per request")
+    rowcounts = database.execute_bulk(sql, [(item.student_id, item.event_id) for item in items])
+    return [
+        {"student_id": item.student_id, "event_id": item.event_id, "status": statuses[bool(rowcount)]}
+        for item, rowcount in zip(items, rowcounts)
+    ]
+
 @app.post("/register")
 def register(student_id: int, event_id: int):
-    with database.get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT OR IGNORE INTO registrations (student_id, event_id, attended) VALUES (?, ?, ?)",
-            (student_id, event_id, 0)
-        )
-        conn.commit()
+    database.execute_write(REGISTER_SQL, (student_id, event_id))
     return {"message": "Student registered"}
 
+@app.post("/register/bulk")
+def register_bulk(items: List[RegistrationItem]):
+    results = apply_bulk(REGISTER_SQL, items, ("already_registered", "registered"))
+    return {"message": "Students registered", "results": results}
+
 # ---------------- ATTENDANCE ----------------
 @app.patch("/attendance")
 def mark_attendance(student_id: int, event_id: int):
-    with database.get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE registrations SET attended = 1 WHERE student_id = ? AND event_id = ?",
-            (student_id, event_id)
-        )
-        conn.commit()
+    database.execute_write(ATTENDANCE_SQL, (student_id, event_id))
     return {"message": "Attendance marked"}
 
+@app.patch("/attendance/bulk")
+def mark_attendance_bulk(items: List[RegistrationItem]):
+    results = apply_bulk(ATTENDANCE_SQL, items, ("not_registered", "marked"))
+    return {"message": "Attendance marked", "results": results}
+
 # ---------------- FEEDBACK ----------------
 @app.post("/feedback")
 def feedback(feedback: Feedback):
-    with database.get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT OR REPLACE INTO feedback (student_id, event_id, rating, comments) VALUES (?, ?, ?, ?)",
-            (feedback.student_id, feedback.event_id, feedback.rating, feedback.comments)
-        )
-        conn.commit()
+    database.execute_write(
+        """
+        INSERT INTO feedback (student_id, event_id, rating, comments) VALUES (?, ?, ?, ?)
+        ON CONFLICT (student_id, event_id) DO UPDATE SET rating = excluded.rating, comments = excluded.comments
+        """,
+        (feedback.student_id, feedback.event_id, feedback.rating, feedback.comments)
+    )
     return {"message": "Feedback submitted"}
 
 # ---------------- REPORTS ----------------
 @app.get("/reports/registrations", response_model=List[Dict])
-def registrations_report():
-    with database.get_connection() as conn:
-        rows = conn.execute("SELECT event_id, COUNT(*) as total FROM registrations GROUP BY event_id").fetchall()
-    return [{"event_id": row[0], "total_registrations": row[1]} for row in rows]
+def registrations_report(filters: Dict = Depends(event_filters)):
+    return json_rows(database.fetch_registrations_report(as_json=True, **filters))
 
 @app.get("/reports/attendance", response_model=List[Dict])
-def attendance_report():
-    with database.get_connection() as conn:
-        rows = conn.execute("""
-            SELECT event_id, ROUND(SUM(attended)*100.0/COUNT(*),2) as percentage
-            FROM registrations GROUP BY event_id
-        """).fetchall()
-    return [{"event_id": row[0], "attendance_percentage": row[1]} for row in rows]
+def attendance_report(filters: Dict = Depends(event_filters)):
+    return json_rows(database.fetch_attendance_report(as_json=True, **filters))
 
 @app.get("/reports/feedback", response_model=List[Dict])
-def feedback_report():
-    with database.get_connection() as conn:
-        rows = conn.execute(
-            "SELECT event_id, ROUND(AVG(rating),2) as avg_feedback FROM feedback GROUP BY event_id"
-        ).fetchall()
-    return [{"event_id": row[0], "avg_feedback": row[1]} for row in rows]
+def feedback_report(filters: Dict = Depends(event_filters)):
+    return json_rows(database.fetch_feedback_report(as_json=True, **filters))
 
 @app.get("/reports/top_students", response_model=List[Dict])
-def top_students():
-    with database.get_connection() as conn:
-        rows = conn.execute("""
-            SELECT s.name, COUNT(r.event_id) as events_attended
-            FROM students s
-            JOIN registrations r ON s.id = r.student_id
-            GROUP BY s.id
-            ORDER BY events_attended DESC
-            LIMIT 3
-        """).fetchall()
-    return [{"name": row[0], "events_attended": row[1]} for row in rows]
+def top_students(filters: Dict = Depends(event_filters)):
+    return json_rows(database.fetch_top_students(as_json=True, **filters))
 
 @app.get("/reports/event_type", response_model=List[Dict])
-def filter_by_type(event_type: str):
-    with database.get_connection() as conn:
-        rows = conn.execute("SELECT * FROM events WHERE type = ?", (event_type,)).fetchall()
-    return [
-        {
-            "id": row[0],
-            "name": row[1],
-            "date": row[2],
-            "location": row[3],
-            "description": row[4],
-            "type": row[5],
-            "college_id": row[6]
-        } for row in rows
-    ]
+def filter_by_type(event_type: str, filters: Dict = Depends(event_filters)):
+    return json_rows(database.fetch_events_by_type(event_type, as_json=True, **filters))
+
+# ---------------- ANALYTICS ----------------
+@app.get("/analytics", response_model=List[Dict])
+def analytics_breakdown(
+    by: List[Literal["college", "type", "period"]] = Query(list(analytics.DIMENSIONS)),
+    interval: Literal["week", "month"] = "month",
+    type: Optional[str] = None,
+    filters: Dict = Depends(event_filters),
+):
+    # Plain def: FastAPI runs it in its thread pool, and large breakdowns are
+    # handed on to worker processes, so the event loop is never blocked.
+    dimensions = list(dict.fromkeys(by))
+    return json_rows(analytics.get_engine().breakdown(dimensions, interval, event_type=type, as_json=True, **filters))
+
+# ---------------- DASHBOARD ----------------
+@app.get("/stats/summary")
+def stats_summary(request: Request, response: Response):
+    # The ETag follows the database change counter, so polling an idle
+    # dashboard is answered with 304 without running any query.
+    etag = f'"{database.change_token()}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return database.fetch_stats_summary()
+
+# ---------------- METRICS ----------------
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,226 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+# ---------------- SETTINGS ----------------
+# Set COLLEGIA_METRICS=1 to collect request and SQL timings. When it is off the
+# middleware is a single attribute check and connections are plain sqlite3 ones.
+ENABLED = os.environ.get("COLLEGIA_METRICS", "0") == "1"
+SLOW_QUERY_MS = float(os.environ.get("COLLEGIA_SLOW_QUERY_MS", "200"))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+slow_query_log = logging.getLogger("collegia.sql")
+
+# ---------------- COLLECTORS ----------------
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label set, as Prometheus expects."""
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...]):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self._series: Dict[Labels, List[float]] = {}  # bucket counts..., +Inf count, sum
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            running = 0
+            for bound, hits in zip(self.buckets + (float("inf"),), values):
+                running += hits
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(key + (('le', le),))} {running}")
+            lines.append(f"{self.name}_sum{_labels(key)} {values[-1]}")
+            lines.append(f"{self.name}_count{_labels(key)} {running}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        lines += [f"{self.name}{_labels(key)} {value}" for key, value in sorted(values.items())]
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+class Gauge(Counter):
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(key: Labels) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in key) + "}"
+
+REQUEST_DURATION = Histogram(
+    "collegia_http_request_duration_seconds", "Time spent handling HTTP requests.", LATENCY_BUCKETS
+)
+RESPONSE_SIZE = Histogram(
+    "collegia_http_response_size_bytes", "Size of HTTP response bodies.", SIZE_BUCKETS
+)
+IN_FLIGHT = Gauge("collegia_http_requests_in_flight", "HTTP requests currently being handled.")
+SQL_DURATION = Histogram(
+    "collegia_sql_statement_duration_seconds", "Time spent executing SQL statements.", LATENCY_BUCKETS
+)
+SQL_FETCH = Counter("collegia_sql_fetch_seconds_total", "Time spent fetching result rows.")
+SQL_SLOW = Counter("collegia_sql_slow_statements_total", "SQL statements slower than the slow-query threshold.")
+
+COLLECTORS = (REQUEST_DURATION, RESPONSE_SIZE, IN_FLIGHT, SQL_DURATION, SQL_FETCH, SQL_SLOW)
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for collector in COLLECTORS:
+        lines += collector.render()
+    return "\n".join(lines) + "\n"
+
+def reset() -> None:
+    for collector in COLLECTORS:
+        collector.reset()
+
+# ---------------- HTTP ----------------
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, response size and in-flight requests per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not ENABLED or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def record(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        method = scope["method"]
+        IN_FLIGHT.inc(method=method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, record)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.inc(-1, method=method)
+            # The router stores the matched route in the scope, which gives the
+            # path template ("/events/search") rather than the raw URL.
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_DURATION.observe(elapsed, method=method, route=route, status=str(status))
+            RESPONSE_SIZE.observe(size, method=method, route=route)
+
+# ---------------- SQL ----------------
+_WHITESPACE = re.compile(r"\s+")
+
+def statement_label(sql: str) -> str:
+    """Collapse whitespace so the same statement always gets the same label."""
+    return _WHITESPACE.sub(" ", sql).strip()[:200]
+
+def _observe_sql(sql: str, elapsed: float) -> None:
+    label = statement_label(sql)
+    SQL_DURATION.observe(elapsed, statement=label)
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        SQL_SLOW.inc(statement=label)
+        slow_query_log.warning("Slow SQL (%.1f ms): %s", elapsed * 1000, label)
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that times execute/executemany and the fetch calls that follow."""
+
+    _statement = ""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._statement = sql
+            _observe_sql(sql, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._statement = sql
+            _observe_sql(sql, time.perf_counter() - started)
+
+    def _timed_fetch(self, fetch, *args):
+        started = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            SQL_FETCH.inc(time.perf_counter() - started, statement=statement_label(self._statement))
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, *args):
+        return self._timed_fetch(super().fetchmany, *args)
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors, including those behind execute(), are TimedCursors."""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def connection_factory():
+    """The sqlite3 connection class to use for new connections."""
+    return TimedConnection if ENABLED else sqlite3.Connection
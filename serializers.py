@@ -0,0 +1,115 @@
+import json
+import threading
+from json.encoder import encode_basestring, encode_basestring_ascii
+from sqlite3 import Cursor
+from typing import Callable, Dict, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+# ---------------- VALUE ENCODERS ----------------
+# The same primitives json.dumps uses, so output is byte-for-byte identical.
+def _encode_float(value: float) -> str:
+    if value != value or value in (float("inf"), float("-inf")):
+        raise ValueError(f"Out of range float values are not JSON compliant: {value!r}")
+    return float.__repr__(value)
+
+def _encoders(ensure_ascii: bool) -> Dict[type, Callable[[object], str]]:
+    return {
+        int: int.__repr__,
+        float: _encode_float,
+        str: encode_basestring_ascii if ensure_ascii else encode_basestring,
+        type(None): lambda _: "null",
+    }
+
+# ---------------- ROW LAYOUTS ----------------
+class RowLayout:
+    """
+    The JSON shape of one query's rows, compiled once: keys are pre-encoded
+    into a %-template so each row only needs its values encoded and slotted in.
+    """
+
+    def __init__(self, columns: Sequence[str], separators: Tuple[str, str], ensure_ascii: bool):
+        item_sep, key_sep = separators
+        encode_key = encode_basestring_ascii if ensure_ascii else encode_basestring
+        self.columns = tuple(columns)
+        self.template = "{" + item_sep.join(
+            encode_key(column).replace("%", "%%") + key_sep + "%s" for column in self.columns
+        ) + "}"
+        self.ensure_ascii = ensure_ascii
+        self._encoders = _encoders(ensure_ascii)
+        self._encode_row = self._compile()
+
+    def _compile(self) -> Callable[[Sequence], str]:
+        # Unrolling the row into named locals avoids a per-row list, tuple and
+        # loop; it roughly halves the cost of encode() on wide rows.
+        names = [f"v{i}" for i in range(len(self.columns))]
+        unpacked = "".join(f"{name}, " for name in names) or "()"
+        values = "".join(f"_e[_t({name})]({name}), " for name in names)
+        source = (
+            f"def encode_row(row, _t=type, _e=encoders, _template=template):\n"
+            f"    {unpacked} = row\n"
+            f"    return _template % ({values})\n"
+        )
+        namespace = {"encoders": self._encoders, "template": self.template}
+        exec(source, namespace)
+        return namespace["encode_row"]
+
+    def _encode_value(self, value) -> str:
+        encoder = self._encoders.get(type(value))
+        if encoder is None:
+            # Anything unusual (bools, int/str subclasses) goes through json itself.
+            return json.dumps(value, ensure_ascii=self.ensure_ascii, allow_nan=False)
+        return encoder(value)
+
+    def encode(self, row: Sequence) -> str:
+        try:
+            return self._encode_row(row)
+        except KeyError:
+            return self.template % tuple([self._encode_value(value) for value in row])
+
+# Matches FastAPI's JSONResponse and json.dumps' defaults respectively.
+COMPACT = ((",", ":"), False)
+DEFAULT = ((", ", ": "), True)
+
+_layouts: Dict[Tuple, RowLayout] = {}
+_layouts_lock = threading.Lock()
+
+def layout_for(cursor: Cursor, style: Tuple = COMPACT) -> RowLayout:
+    """The cached layout for the columns of an executed cursor."""
+    key = (tuple(d[0] for d in cursor.description), style)
+    layout = _layouts.get(key)
+    if layout is None:
+        with _layouts_lock:
+            layout = _layouts.setdefault(key, RowLayout(key[0], *style))
+    return layout
+
+# ---------------- ENCODING ----------------
+class EncodedRows(NamedTuple):
+    body: bytes
+    count: int
+    columns: Tuple[str, ...]
+    last_row: Optional[tuple]
+
+    def last(self, column: str):
+        """Value of `column` in the final row, e.g. the keyset cursor for the next page."""
+        return self.last_row[self.columns.index(column)] if self.last_row is not None else None
+
+def encode_cursor(cursor: Cursor) -> EncodedRows:
+    """
+    Encode every row of an executed cursor as a JSON array, without building
+    dicts. The cursor must return plain tuples (row_factory = None).
+    """
+    if cursor.description is None:
+        return EncodedRows(b"[]", 0, (), None)
+    layout = layout_for(cursor)
+    rows = cursor.fetchall()
+    body = "[" + ",".join([layout.encode(row) for row in rows]) + "]"
+    return EncodedRows(body.encode("utf-8"), len(rows), layout.columns, rows[-1] if rows else None)
+
+def ndjson_lines(cursor: Cursor, batch_size: int) -> Iterator[str]:
+    """Yield newline-delimited JSON straight off the cursor, one batch of lines at a time."""
+    layout = None
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        layout = layout or layout_for(cursor, DEFAULT)
+        yield "".join([layout.encode(row) + "\n" for row in rows])
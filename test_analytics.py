@@ -0,0 +1,132 @@
+import pytest
+
+import analytics
+import database
+from benchmark.generate import generate
+
+
+@pytest.fixture
+def engine(db_path):
+    yield analytics.get_engine()
+    analytics.close_engine()
+
+
+def sql_breakdown(interval_sql):
+    """The college × type × period breakdown computed by SQLite, for comparison."""
+    with database.read_connection() as conn:
+        rows = conn.execute(f"""
+            SELECT e.college_id, e.type, {interval_sql} AS period, COUNT(*),
+                COALESCE(SUM(s.registrations), 0), COALESCE(SUM(s.attended), 0),
+                COALESCE(SUM(s.rating_sum), 0), COALESCE(SUM(s.rating_count), 0)
+            FROM events e LEFT JOIN event_stats s ON s.event_id = e.id
+            GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        """).fetchall()
+    return [tuple(row) for row in rows]
+
+
+def totals(rows):
+    return [
+        (r["college_id"], r["type"], r["period"], r["events"], r["registrations"], r["attended"],
+         round(r["avg_feedback"] * r["ratings"]) if r["ratings"] else 0, r["ratings"])
+        for r in rows
+    ]
+
+
+def test_breakdown_by_college_type_and_period(client):
+    database.insert_dummy_data()
+    database.execute_write(
+        "INSERT INTO events (name, date, location, description, type, college_id) "
+        "VALUES ('Hackathon', '2025-10-01', 'Hall', '24h build', 'Seminar', 202)"
+    )
+
+    rows = client.get("/analytics").json()
+    assert rows == [
+        {"college_id": 101, "type": "Seminar", "period": "2025-09", "events": 1, "registrations": 2,
+         "attended": 1, "attendance_percentage": 50.0, "ratings": 2, "avg_feedback": 4.5},
+        {"college_id": 101, "type": "Workshop", "period": "2025-09", "events": 1, "registrations": 1,
+         "attended": 1, "attendance_percentage": 100.0, "ratings": 0, "avg_feedback": None},
+        {"college_id": 202, "type": "Seminar", "period": "2025-10", "events": 1, "registrations": 0,
+         "attended": 0, "attendance_percentage": None, "ratings": 0, "avg_feedback": None},
+    ]
+
+    weeks = client.get("/analytics", params={"by": "period", "interval": "week"}).json()
+    # 2025-09-10 and 2025-09-12 share the week starting Monday 2025-09-08.
+    assert [(w["period"], w["events"]) for w in weeks] == [("2025-09-08", 2), ("2025-09-29", 1)]
+
+    seminars = client.get("/analytics", params={"by": ["college"], "type": "Seminar", "date_to": "2025-09-30"})
+    assert [(r["college_id"], r["events"], r["registrations"]) for r in seminars.json()] == [(101, 1, 2)]
+    assert client.get("/analytics", params={"by": "venue"}).status_code == 422
+
+
+def test_breakdown_matches_sql(db_path, engine):
+    generate(db_path, colleges=4, events=300, students=200, registrations=3000, feedback=800)
+    rows = engine.breakdown(["college", "type", "period"], "month")
+    assert totals(rows) == sql_breakdown("substr(e.date, 1, 7)")
+
+
+def test_snapshot_refreshes_from_changes_only(db_path, engine):
+    generate(db_path, colleges=3, events=100, students=100, registrations=1000, feedback=200)
+    engine.breakdown()
+    seq = engine.snapshot().seq
+
+    database.execute_write("INSERT INTO students (id, name, email) VALUES (1000, 'New', 'new@example.edu')")
+    database.execute_write("INSERT INTO registrations (student_id, event_id) VALUES (1000, 7)")
+    database.execute_write("UPDATE registrations SET attended = 1 WHERE event_id = 8")
+    database.execute_write("INSERT OR REPLACE INTO feedback (student_id, event_id, rating) VALUES (2, 9, 1)")
+    database.execute_write(
+        "INSERT INTO events (name, date, location, description, type, college_id) "
+        "VALUES ('New', '2026-01-05', 'Hall', '', 'Brand new type', 1)"
+    )
+    with database.write_connection() as conn:
+        conn.execute("DELETE FROM registrations WHERE event_id = 10")
+        conn.execute("DELETE FROM events WHERE id = 10")
+
+    _, _, changed = database.fetch_event_measures(since=seq)
+    assert {row[0] for row in changed} <= {7, 8, 9, 10, 101}
+    assert {7, 9, 10, 101} <= {row[0] for row in changed}
+
+    refreshed = engine.breakdown(["college", "type", "period"], "month")
+    assert engine.snapshot().seq > seq
+    assert totals(refreshed) == sql_breakdown("substr(e.date, 1, 7)")
+    assert refreshed == analytics.breakdown(
+        analytics.load_snapshot().columns, analytics.load_snapshot().types, ["college", "type", "period"]
+    )
+
+
+def test_large_breakdowns_run_in_worker_processes(db_path, engine, monkeypatch):
+    generate(db_path, colleges=2, events=50, students=50, registrations=300, feedback=50)
+    in_thread = engine.breakdown(["type", "period"], "week")
+    encoded = engine.breakdown(["type", "period"], "week", as_json=True)
+    monkeypatch.setattr(analytics, "PROCESS_THRESHOLD", 1)
+    assert engine.breakdown(["type", "period"], "week") == in_thread
+    assert engine.breakdown(["type", "period"], "week", as_json=True) == encoded
+    assert engine._executor is not None
+    # The snapshot went to the workers once, as a shared memory block.
+    assert len(engine._shared) == 1
+
+    database.execute_write("INSERT INTO events (name, date, type, college_id) VALUES ('Late', '2025-12-01', 'Talk', 1)")
+    assert engine.breakdown(["type"]) == analytics.breakdown(
+        analytics.load_snapshot().columns, analytics.load_snapshot().types, ["type"]
+    )
+    assert len(engine._shared) == 2
+
+
+def test_refresh_sees_bulk_loaded_events(db_path, engine):
+    database.insert_dummy_data()
+    assert sum(r["events"] for r in engine.breakdown(["college"])) == 2
+
+    generate(db_path, colleges=2, events=50, students=20, registrations=10, feedback=0)
+    database.execute_write("UPDATE registrations SET attended = 1 WHERE event_id = 1")
+    assert sum(r["events"] for r in engine.breakdown(["college"])) == 52
+    assert len(engine.snapshot()) == 52
+
+
+def test_refresh_falls_back_to_full_load_on_drift(db_path, engine):
+    database.insert_dummy_data()
+    engine.breakdown()
+    with database.write_connection() as conn:
+        conn.execute("DROP TRIGGER events_changes_insert")
+        conn.execute("INSERT INTO events (name, date, type, college_id) VALUES ('Unlogged', '2025-11-01', 'Talk', 303)")
+
+    rows = engine.breakdown(["college"])
+    assert [(r["college_id"], r["events"]) for r in rows] == [(101, 2), (303, 1)]
@@ -0,0 +1,162 @@
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import database
+
+
+def add_students(count):
+    with database.write_connection() as conn:
+        conn.executemany(
+            "INSERT INTO students (name, email) VALUES (?, ?)",
+            [(f"Student {i}", f"student{i}@example.com") for i in range(count)],
+        )
+
+
+def test_list_without_limit_returns_everything(client):
+    add_students(5)
+    response = client.get("/students")
+    assert [s["id"] for s in response.json()] == [1, 2, 3, 4, 5]
+    assert "X-Next-After" not in response.headers
+
+
+def test_keyset_pagination_walks_all_pages(client):
+    add_students(7)
+    seen, after = [], 0
+    while True:
+        response = client.get("/students", params={"limit": 3, "after": after})
+        page = response.json()
+        seen += [s["id"] for s in page]
+        if "X-Next-After" not in response.headers:
+            break
+        after = int(response.headers["X-Next-After"])
+    assert seen == list(range(1, 8))
+
+
+def test_limit_is_bounded(client):
+    assert client.get("/events", params={"limit": 0}).status_code == 422
+    assert client.get("/events", params={"limit": 100000}).status_code == 422
+
+
+def test_ndjson_stream_matches_list(client):
+    database.insert_dummy_data()
+    response = client.get("/events", params={"stream": True})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows == client.get("/events").json()
+
+
+def test_bulk_registration_and_attendance_report_each_row(client):
+    database.insert_dummy_data()
+    pairs = [
+        {"student_id": 2, "event_id": 2},
+        {"student_id": 1, "event_id": 1},
+    ]
+    response = client.post("/register/bulk", json=pairs)
+    assert [r["status"] for r in response.json()["results"]] == ["registered", "already_registered"]
+
+    response = client.patch("/attendance/bulk", json=pairs + [{"student_id": 9, "event_id": 9}])
+    assert [r["status"] for r in response.json()["results"]] == ["marked", "marked", "not_registered"]
+    assert client.get("/reports/attendance").json()[1] == {"event_id": 2, "attendance_percentage": 100.0}
+
+
+def test_bulk_size_is_bounded(client, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "MAX_BULK_SIZE", 2)
+    pairs = [{"student_id": i, "event_id": 1} for i in range(3)]
+    assert client.post("/register/bulk", json=pairs).status_code == 413
+
+
+def test_concurrent_single_writes_are_group_committed(client):
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(lambda i: database.execute_write(
+            "INSERT INTO registrations (student_id, event_id) VALUES (?, 1)", (i,)), range(300)))
+    assert client.get("/reports/registrations").json() == [{"event_id": 1, "total_registrations": 300}]
+
+
+def test_failed_write_in_a_batch_does_not_sink_the_others(client):
+    bad = database._write_queue.submit("INSERT INTO feedback (student_id, event_id, rating) VALUES (1, 1, 9)", ())
+    good = database._write_queue.submit("INSERT INTO feedback (student_id, event_id, rating) VALUES (2, 1, 5)", ())
+    with pytest.raises(sqlite3.IntegrityError):
+        bad.result()
+    assert good.result() == 1
+
+
+def test_write_submitted_while_stopping_does_not_hang_stop(db_path, monkeypatch):
+    applying = threading.Event()
+    apply = database.WriteQueue._apply
+
+    def slow_apply(batch):
+        applying.set()
+        time.sleep(0.3)
+        apply(batch)
+
+    monkeypatch.setattr(database.WriteQueue, "_apply", staticmethod(slow_apply))
+    first = database._write_queue.submit("INSERT INTO students (name, email) VALUES ('A', 'a@example.com')", ())
+    applying.wait()
+    stopper = threading.Thread(target=database._write_queue.stop)
+    stopper.start()
+    time.sleep(0.05)  # stop() is now joining the busy writer
+    second = database._write_queue.submit("INSERT INTO students (name, email) VALUES ('B', 'b@example.com')", ())
+
+    assert first.result(timeout=5) == 1
+    assert second.result(timeout=5) == 1
+    stopper.join(timeout=5)
+    assert not stopper.is_alive()
+    database._write_queue.stop()
+
+
+def test_stats_summary_and_conditional_get(client):
+    database.insert_dummy_data()
+    response = client.get("/stats/summary")
+    assert response.json() == {"events": 2, "students": 2, "registrations": 3, "avg_feedback": 4.5}
+    etag = response.headers["ETag"]
+
+    cached = client.get("/stats/summary", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    client.post("/students", json={"name": "Cara", "email": "cara@example.com"})
+    changed = client.get("/stats/summary", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["students"] == 3
+
+
+def test_change_token_does_not_repeat_after_pool_reopens(db_path):
+    database.insert_dummy_data()
+    before = database.change_token()
+    database.close_pool()  # the next watcher connection counts data_version from scratch
+    with database.write_connection() as conn:
+        conn.execute("INSERT INTO students (name, email) VALUES ('Dan', 'dan@example.com')")
+    assert database.change_token() != before
+
+
+def test_event_search_ranks_prefixes_and_tracks_changes(client):
+    database.insert_dummy_data()
+    client.post("/events", json={
+        "name": "Robotics Expo", "date": "2025-11-02", "location": "Python Hall",
+        "description": "Robots built by students", "type": "Expo", "college_id": 202,
+    })
+
+    hits = client.get("/events/search", params={"q": "pyth"}).json()
+    assert [e["id"] for e in hits] == [2, 3]  # name match outranks location match
+    assert "<mark>Python</mark>" in hits[0]["snippet"]
+    assert [e["id"] for e in client.get("/events/search", params={"q": "pyth", "college_id": 202}).json()] == [3]
+    assert [e["id"] for e in client.get("/events/search", params={"q": "pyth", "type": "Workshop"}).json()] == [2]
+    assert client.get("/events/search", params={"q": '"AND (*'}).json() == []
+    # One character is too short for the prefix index, so it only matches whole words.
+    assert client.get("/events/search", params={"q": "p"}).json() == []
+    assert database._match_expression("a pyth") == '"a" "pyth"*'
+
+    with database.write_connection() as conn:
+        conn.execute("UPDATE events SET name = 'Rust Workshop' WHERE id = 2")
+        conn.execute("DELETE FROM events WHERE id = 3")
+    assert client.get("/events/search", params={"q": "python"}).json()[0]["id"] == 2  # still in description
+    assert client.get("/events/search", params={"q": "robot"}).json() == []
+    assert [e["id"] for e in client.get("/events/search", params={"q": "rust"}).json()] == [2]
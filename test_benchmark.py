@@ -0,0 +1,29 @@
+import asyncio
+
+import database
+from benchmark.generate import generate
+from benchmark.load import compare, run
+
+
+def test_generate_fills_consistent_data(db_path):
+    generate(db_path, colleges=3, events=40, students=60, registrations=500, feedback=100)
+    stats = database.fetch_stats_summary()
+    assert (stats["events"], stats["students"], stats["registrations"]) == (40, 60, 500)
+    assert len(database.fetch_feedback()) == 100
+    assert database.verify_summaries() == []
+    assert database.search_events(database.fetch_all_events(limit=1)[0]["name"])
+
+
+def test_load_covers_every_route_and_flags_regressions(db_path):
+    generate(db_path, colleges=2, events=20, students=30, registrations=100, feedback=20)
+    results = asyncio.run(run(requests=10, concurrency=4))
+    scenarios = results["scenarios"]
+    assert "GET /stats/summary" in scenarios and "mixed:check_in" in scenarios
+    assert all(s["errors"] == 0 for s in scenarios.values())
+    assert {"p50_ms", "p95_ms", "p99_ms", "throughput_rps"} <= set(scenarios["POST /register"])
+
+    slower = {"scenarios": {
+        name: {**stats, "p95_ms": stats["p95_ms"] * 2} for name, stats in scenarios.items()
+    }}
+    assert compare(results, results, 0.25) == []
+    assert compare(slower, results, 0.25)
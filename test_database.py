@@ -0,0 +1,161 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import database
+
+
+def test_pooled_connections_are_tuned(db_path):
+    with database.read_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+    with database.write_connection() as conn:
+        assert conn.execute("PRAGMA query_only").fetchone()[0] == 0
+
+
+def test_pool_reuses_and_closes_connections(db_path):
+    with database.read_connection() as first:
+        pass
+    with database.read_connection() as second:
+        assert second is first
+    pool = database.get_pool()
+    assert pool.created == 1
+    database.close_pool()
+    assert pool.created == 0
+
+
+def test_close_wakes_readers_waiting_for_a_connection(db_path):
+    pool = database.get_pool()
+    held = [pool._acquire_reader() for _ in range(pool.size)]
+    errors = []
+
+    def wait():
+        try:
+            pool._acquire_reader()
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    while pool._waiting == 0:
+        time.sleep(0.01)
+    database.close_pool()
+    waiter.join(timeout=5)
+    assert not waiter.is_alive()
+    assert [str(exc) for exc in errors] == ["Connection pool is closed"]
+    for conn in held:
+        pool._release_reader(conn)
+    assert pool.created == 0
+
+
+def test_open_streams_do_not_hold_pooled_connections(db_path):
+    database.insert_dummy_data()
+    pool = database.get_pool()
+    # Streams paused mid-response, e.g. behind slow clients.
+    streams = [database.iter_events(as_json=True) for _ in range(pool.size + 2)]
+    for stream in streams:
+        next(stream)
+    assert pool.created == 0
+    assert len(database.fetch_all_events()) == 2
+    for stream in streams:
+        stream.close()
+
+
+@pytest.mark.parametrize("pooled", [True, False])
+def test_concurrent_readers_alongside_writer(db_path, monkeypatch, pooled):
+    monkeypatch.setattr(database, "POOL_ENABLED", pooled)
+    writes, readers = 200, 16
+    errors = []
+    done = threading.Event()
+
+    def write():
+        try:
+            for i in range(writes):
+                with database.write_connection() as conn:
+                    conn.execute(
+                        "INSERT INTO students (name, email) VALUES (?, ?)",
+                        (f"Student {i}", f"student{i}@example.com"),
+                    )
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            done.set()
+
+    def read():
+        try:
+            last = 0
+            while not done.is_set():
+                with database.read_connection() as conn:
+                    count = conn.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+                assert count >= last
+                last = count
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=read) for _ in range(readers)]
+    threads.append(threading.Thread(target=write))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len(database.fetch_all_students()) == writes
+    if pooled:
+        assert database.get_pool().created <= database.POOL_SIZE
+
+
+def test_summaries_follow_writes_and_verify_clean(db_path):
+    database.insert_dummy_data()
+    with database.write_connection() as conn:
+        conn.execute("INSERT INTO registrations (student_id, event_id) VALUES (2, 2)")
+        conn.execute("UPDATE registrations SET attended = 1 WHERE student_id = 2 AND event_id = 1")
+        conn.execute("DELETE FROM registrations WHERE student_id = 1 AND event_id = 2")
+        conn.execute(
+            "INSERT INTO feedback (student_id, event_id, rating) VALUES (1, 1, 2) "
+            "ON CONFLICT (student_id, event_id) DO UPDATE SET rating = excluded.rating"
+        )
+        conn.execute("DELETE FROM feedback WHERE student_id = 2")
+    assert database.verify_summaries() == []
+    assert database.fetch_registrations_report() == [
+        {"event_id": 1, "total_registrations": 2},
+        {"event_id": 2, "total_registrations": 1},
+    ]
+    assert database.fetch_attendance_report()[0] == {"event_id": 1, "attendance_percentage": 100.0}
+    assert database.fetch_feedback_report() == [{"event_id": 1, "avg_feedback": 2.0}]
+    assert database.fetch_top_students() == [
+        {"name": "Bob", "events_attended": 2},
+        {"name": "Alice", "events_attended": 1},
+    ]
+
+
+def test_verify_reports_drift_and_rebuild_repairs_it(db_path):
+    database.insert_dummy_data()
+    with database.write_connection() as conn:
+        conn.execute("UPDATE event_stats SET registrations = 99 WHERE event_id = 1")
+    diffs = database.verify_summaries()
+    assert diffs == [{"table": "event_stats", "id": 1, "expected": [2, 1, 9, 2], "actual": [99, 1, 9, 2]}]
+    database.rebuild_summaries()
+    assert database.verify_summaries() == []
+
+
+def test_migrations_adopt_a_pre_migration_database(tmp_path, monkeypatch):
+    path = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(path)
+    legacy.executescript(database.BASE_SCHEMA)
+    legacy.execute("INSERT INTO registrations (student_id, event_id, attended) VALUES (1, 7, 1)")
+    legacy.commit()
+    legacy.close()
+
+    database.close_pool()
+    monkeypatch.setattr(database, "DB_PATH", path)
+    try:
+        assert database.migrate() == len(database.MIGRATIONS)
+        assert database.migrate() == len(database.MIGRATIONS)
+        assert database.verify_summaries() == []
+        assert database.fetch_attendance_report() == [{"event_id": 7, "attendance_percentage": 100.0}]
+    finally:
+        database.close_pool()
@@ -1,17 +1,28 @@
+import database
 from database import fetch_all_events, fetch_all_students, fetch_registrations, fetch_feedback
 
-print("Events:")
-for e in fetch_all_events():
-    print(dict(e))
 
-print("\nStudents:")
-for s in fetch_all_students():
-    print(dict(s))
+def test_fetch_functions(db_path):
+    database.insert_dummy_data()
+    assert [e["name"] for e in fetch_all_events()] == ["Tech Talk", "Python Workshop"]
+    assert [s["name"] for s in fetch_all_students()] == ["Alice", "Bob"]
+    assert len(fetch_registrations()) == 3
+    assert [f["rating"] for f in fetch_feedback()] == [5, 4]
 
-print("\nRegistrations:")
-for r in fetch_registrations():
-    print(dict(r))
 
-print("\nFeedback:")
-for f in fetch_feedback():
-    print(dict(f))
+if __name__ == "__main__":
+    print("Events:")
+    for e in fetch_all_events():
+        print(dict(e))
+
+    print("\nStudents:")
+    for s in fetch_all_students():
+        print(dict(s))
+
+    print("\nRegistrations:")
+    for r in fetch_registrations():
+        print(dict(r))
+
+    print("\nFeedback:")
+    for f in fetch_feedback():
+        print(dict(f))
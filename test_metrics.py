@@ -0,0 +1,54 @@
+import logging
+import sqlite3
+
+import pytest
+
+import database
+import metrics
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_connections_are_plain_when_disabled(db_path):
+    with database.read_connection() as conn:
+        assert type(conn) is sqlite3.Connection
+
+
+def test_requests_and_sql_are_recorded(enabled, client):
+    database.close_pool()  # reopen connections with timing enabled
+    database.insert_dummy_data()
+    assert client.get("/events/search", params={"q": "tech"}).status_code == 200
+
+    text = client.get("/metrics").text
+    assert 'collegia_http_request_duration_seconds_count{method="GET",route="/events/search",status="200"} 1' in text
+    assert 'collegia_http_response_size_bytes_count{method="GET",route="/events/search"} 1' in text
+    assert 'collegia_http_requests_in_flight{method="GET"} 1' in text  # the /metrics request itself
+    assert "collegia_sql_statement_duration_seconds_count{statement=\"SELECT e.*, snippet(" in text
+    assert "collegia_sql_fetch_seconds_total{statement=\"SELECT e.*, snippet(" in text
+
+
+def test_slow_statements_are_logged(enabled, db_path, monkeypatch, caplog):
+    monkeypatch.setattr(metrics, "SLOW_QUERY_MS", 0)
+    database.close_pool()
+    with caplog.at_level(logging.WARNING, logger="collegia.sql"):
+        with database.read_connection() as conn:
+            conn.execute("SELECT   COUNT(*)\n FROM events").fetchone()
+    assert "Slow SQL" in caplog.text
+    assert 'collegia_sql_slow_statements_total{statement="SELECT COUNT(*) FROM events"} 1' in metrics.render()
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("h", "test", (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, route="/x")
+    lines = histogram.render()
+    assert 'h_bucket{route="/x",le="0.1"} 2' in lines
+    assert 'h_bucket{route="/x",le="1.0"} 3' in lines
+    assert 'h_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 'h_count{route="/x"} 4' in lines
@@ -0,0 +1,136 @@
+import re
+import sqlite3
+
+import pytest
+
+import database
+
+# Summary tables are sized by events/students, so reading them in full is the point.
+SCANNABLE = {"event_stats", "student_stats", "CONSTANT"}
+# The FTS5 planner reports index lookups on the search table as scans.
+SCANNABLE.add("events_fts")
+
+# Endpoints that take no college/date filters.
+UNFILTERED = {"/students", "/stats/summary"}
+
+FILTERS = [
+    {},
+    {"college_id": 101},
+    {"date_from": "2025-09-01", "date_to": "2025-09-30"},
+    {"college_id": 101, "date_from": "2025-09-01"},
+]
+
+ENDPOINTS = [
+    ("/events", {}),
+    ("/events", {"limit": 10, "after": 1}),
+    ("/events", {"stream": True}),
+    ("/students", {"limit": 10}),
+    ("/reports/registrations", {}),
+    ("/reports/attendance", {}),
+    ("/reports/feedback", {}),
+    ("/reports/top_students", {}),
+    ("/reports/event_type", {"event_type": "Seminar"}),
+    ("/stats/summary", {}),
+    ("/events/search", {"q": "tech"}),
+    ("/events/search", {"q": "work", "type": "Workshop"}),
+]
+
+
+@pytest.fixture
+def traced(db_path, monkeypatch):
+    """Record every SELECT the endpoints send to SQLite."""
+    statements = []
+    connect = database._connect
+
+    def tracing_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    database.close_pool()
+    monkeypatch.setattr(database, "_connect", tracing_connect)
+    database.insert_dummy_data()
+    return statements
+
+
+def full_scans(sql):
+    conn = sqlite3.connect(database.DB_PATH)
+    try:
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    finally:
+        conn.close()
+    scans = []
+    for *_, detail in plan:
+        match = re.match(r"SCAN (\S+)", detail)
+        if match and match.group(1) not in SCANNABLE:
+            scans.append(detail)
+    return scans
+
+
+@pytest.mark.parametrize("filters", FILTERS, ids=lambda f: ",".join(f) or "unfiltered")
+@pytest.mark.parametrize("path,params", ENDPOINTS, ids=[f"{p}{sorted(q)}" for p, q in ENDPOINTS])
+def test_endpoint_queries_avoid_full_table_scans(client, traced, path, params, filters):
+    if path in UNFILTERED and filters:
+        pytest.skip("endpoint takes no college or date filters")
+    del traced[:]
+    response = client.get(path, params={**params, **filters})
+    assert response.status_code == 200
+
+    # FTS5 reads its own shadow tables (events_fts_config, ...) through the same hook.
+    selects = [
+        sql for sql in traced
+        if sql.lstrip().upper().startswith("SELECT") and "events_fts_" not in sql
+    ]
+    assert selects, f"{path} ran no SELECT"
+    for sql in selects:
+        assert full_scans(sql) == [], sql
+
+
+def test_filters_narrow_results(client):
+    database.insert_dummy_data()
+    with database.write_connection() as conn:
+        conn.execute(
+            "INSERT INTO events (name, date, location, description, type, college_id) "
+            "VALUES ('Hackathon', '2025-10-01', 'Hall', '24h build', 'Seminar', 202)"
+        )
+        conn.execute("INSERT INTO registrations (student_id, event_id) VALUES (2, 3)")
+
+    assert [e["id"] for e in client.get("/events", params={"college_id": 202}).json()] == [3]
+    assert [e["id"] for e in client.get("/events", params={"date_to": "2025-09-11"}).json()] == [1]
+    assert client.get("/reports/registrations", params={"college_id": 202}).json() == [
+        {"event_id": 3, "total_registrations": 1},
+    ]
+    assert client.get("/reports/top_students", params={"college_id": 101}).json() == [
+        {"name": "Alice", "events_attended": 2},
+        {"name": "Bob", "events_attended": 1},
+    ]
+    assert client.get("/reports/top_students", params={"date_from": "2025-10-01"}).json() == [
+        {"name": "Bob", "events_attended": 1},
+    ]
+    seminars = client.get("/reports/event_type", params={"event_type": "Seminar", "college_id": 101})
+    assert [e["id"] for e in seminars.json()] == [1]
+    assert client.get("/events", params={"date_from": "not-a-date"}).status_code == 422
+
+
+def test_date_to_includes_the_whole_day(client):
+    with database.write_connection() as conn:
+        conn.execute(
+            "INSERT INTO events (name, date, location, description, type, college_id) "
+            "VALUES ('Evening Talk', '2025-09-10T18:00', 'Hall', 'After hours', 'Seminar', 101)"
+        )
+        conn.execute("INSERT INTO registrations (student_id, event_id) VALUES (1, 1)")
+    params = {"date_from": "2025-09-10", "date_to": "2025-09-10"}
+    assert [e["id"] for e in client.get("/events", params=params).json()] == [1]
+    assert client.get("/reports/registrations", params=params).json() == [
+        {"event_id": 1, "total_registrations": 1},
+    ]
+    analytics = client.get("/analytics", params={**params, "by": "college"}).json()
+    assert [(r["events"], r["registrations"]) for r in analytics] == [(1, 1)]
+
+    # The last representable day has no next day to bound by.
+    params = {"date_to": "9999-12-31"}
+    assert [e["id"] for e in client.get("/events", params=params).json()] == [1]
+    assert client.get("/reports/registrations", params=params).status_code == 200
+    assert client.get("/reports/event_type", params={**params, "event_type": "Seminar"}).status_code == 200
+    assert client.get("/events/search", params={**params, "q": "talk"}).json()[0]["id"] == 1
+    assert client.get("/analytics", params=params).status_code == 200
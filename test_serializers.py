@@ -0,0 +1,66 @@
+import json
+import sqlite3
+
+import pytest
+
+import database
+import serializers
+
+TRICKY = [
+    (1, 'Café "ünï" \n\t  😀 <b>', None, 4.5, "back\\slash \x01 100%"),
+    (2, "", 0, -0.0, "plain"),
+    (3, "x" * 3, 2**62, 1e-7, None),
+]
+COLUMNS = ("id", "name", "count", "score", "note %s")
+
+
+def cursor_over(rows):
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"CREATE TABLE t ({', '.join(f'[{c}]' for c in COLUMNS)})")
+    conn.executemany("INSERT INTO t VALUES (?, ?, ?, ?, ?)", rows)
+    return conn.execute("SELECT * FROM t")
+
+
+def test_encoded_rows_match_json_dumps_byte_for_byte():
+    encoded = serializers.encode_cursor(cursor_over(TRICKY))
+    expected = json.dumps(
+        [dict(zip(COLUMNS, row)) for row in TRICKY],
+        ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"),
+    ).encode("utf-8")
+    assert encoded.body == expected
+    assert (encoded.count, encoded.last("id")) == (3, 3)
+
+
+def test_ndjson_matches_json_dumps_defaults():
+    lines = "".join(serializers.ndjson_lines(cursor_over(TRICKY), batch_size=2))
+    assert lines == "".join(json.dumps(dict(zip(COLUMNS, row))) + "\n" for row in TRICKY)
+
+
+def test_non_finite_floats_are_rejected_like_json():
+    with pytest.raises(ValueError):
+        serializers.encode_cursor(cursor_over([(1, "a", 0, float("inf"), None)]))
+
+
+def test_endpoints_are_byte_compatible_with_the_dict_path(client):
+    database.insert_dummy_data()
+    with database.write_connection() as conn:
+        conn.execute(
+            "INSERT INTO events (name, date, location, description, type, college_id) VALUES (?, ?, ?, ?, ?, ?)",
+            ('Café "Ünï"   😀', "2025-09-11", None, "tab\there", "Seminar", 101),
+        )
+
+    def dumps(rows):
+        return json.dumps(rows, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+    assert client.get("/events").content == dumps(database.fetch_all_events())
+    assert client.get("/students").content == dumps(database.fetch_all_students())
+    assert client.get("/reports/attendance").content == dumps(database.fetch_attendance_report())
+    assert client.get("/reports/feedback").content == dumps(database.fetch_feedback_report())
+    assert client.get("/reports/top_students").content == dumps(database.fetch_top_students())
+    assert client.get("/reports/event_type", params={"event_type": "Seminar"}).content == dumps(
+        database.fetch_events_by_type("Seminar")
+    )
+    assert client.get("/events/search", params={"q": "cafe"}).content == dumps(database.search_events("cafe"))
+    assert client.get("/events", params={"stream": True}).text == "".join(
+        json.dumps(row) + "\n" for row in database.fetch_all_events()
+    )